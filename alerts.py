@@ -0,0 +1,243 @@
+import threading
+import time
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+from indicators import rsi
+
+# ========================
+# PRICE ALERTS
+# ========================
+# Every session's rules live in one set of columnar arrays (coin, currency,
+# metric, direction, threshold, cooldown, state). Each new market snapshot is
+# checked against all of them in a single vectorized pass: the snapshot
+# becomes a (metric, coin) value matrix, rules gather their value by index
+# and compare. A rule fires when its condition turns true, then stays quiet
+# until the condition clears again (no repeats while a price sits above the
+# line) and for at least its cooldown. Fired alerts are kept per evaluation
+# and read by each owner from where it last stopped. Owners that have not
+# asked for `idle_after` seconds and are no longer alive (a closed browser
+# tab) lose their rules.
+
+METRICS = ('price', 'change_24h', 'change_7d', 'rsi')
+# RSI rules fire on a cross of the threshold between the last two hourly
+# points of the 7-day sparkline, not on the level
+CROSSING = {'rsi'}
+COOLDOWN = 3600
+IDLE_AFTER = 600
+EVENT_COLUMNS = ['rule', 'coin', 'currency', 'metric', 'above', 'threshold', 'value', 'at']
+
+
+class AlertBook:
+    def __init__(self, columns, sparkline=None, capacity=1024, max_events=50, max_batches=100,
+                 idle_after=IDLE_AFTER, alive=None):
+        # columns: metric -> snapshot column; sparkline: column of the 7-day
+        # hourly series RSI is computed from (RSI rules never fire without it);
+        # alive(owner) -> bool keeps idle but still connected owners
+        self.columns = columns
+        self.sparkline = sparkline
+        self.max_events = max_events
+        self.idle_after = idle_after
+        self.alive = alive
+        self._lock = threading.Lock()
+        self._n = 0
+        self._free = []
+        self._alloc(capacity)
+        self._owners, self._coins, self._currencies = {}, {}, {}
+        self._names = {'owner': [], 'coin': [], 'currency': []}
+        # Fired rows per evaluation; each owner reads past its cursor
+        self._batches = deque(maxlen=max_batches)
+        self._seq = 0
+        self._cursor = {}
+        self._asked = {}
+        self._seen = {}
+        self._coin_index = None
+
+    def _alloc(self, capacity):
+        old = getattr(self, '_arrays', {})
+        # sign: +1 fires at or above the threshold, -1 at or below it
+        spec = {'owner': np.int32, 'coin': np.int32, 'currency': np.int16, 'metric': np.int64,
+                'sign': np.float64, 'crossing': bool, 'threshold': np.float64, 'cooldown': np.float64,
+                'last_fired': np.float64, 'armed': bool, 'active': bool}
+        self._arrays = {}
+        for name, dtype in spec.items():
+            a = np.zeros(capacity, dtype=dtype)
+            if name in old:
+                a[:len(old[name])] = old[name]
+            self._arrays[name] = a
+
+    def _code(self, table, kind, value):
+        code = table.get(value)
+        if code is None:
+            # Expired owners leave their slot behind, so codes are never reused
+            code = table[value] = len(self._names[kind])
+            self._names[kind].append(value)
+            if kind == 'coin':
+                self._coin_index = None
+        return code
+
+    @property
+    def metrics(self):
+        # The metrics this book's snapshots can answer
+        return tuple(m for m in METRICS if m in self.columns or (m == 'rsi' and self.sparkline))
+
+    @property
+    def size(self):
+        return self._n - len(self._free)
+
+    def add(self, owner, coin, currency, metric, above, threshold, cooldown=COOLDOWN) -> int:
+        """Register a rule; returns its id."""
+        if metric not in METRICS:
+            raise ValueError(f"unknown metric {metric!r}; choose from {', '.join(METRICS)}")
+        with self._lock:
+            if self._free:
+                i = self._free.pop()
+            else:
+                if self._n == len(self._arrays['active']):
+                    self._alloc(2 * self._n)
+                i, self._n = self._n, self._n + 1
+            a = self._arrays
+            if owner not in self._owners:
+                # New owners only hear about what fires from now on
+                self._cursor[owner] = self._seq
+            self._asked[owner] = time.time()
+            a['owner'][i] = self._code(self._owners, 'owner', owner)
+            a['coin'][i] = self._code(self._coins, 'coin', coin)
+            a['currency'][i] = self._code(self._currencies, 'currency', currency)
+            a['metric'][i] = METRICS.index(metric)
+            a['crossing'][i] = metric in CROSSING
+            a['sign'][i], a['threshold'][i], a['cooldown'][i] = 1.0 if above else -1.0, threshold, cooldown
+            a['last_fired'][i], a['armed'][i], a['active'][i] = -np.inf, True, True
+            # Re-checking a snapshot is harmless for existing rules (fired
+            # ones are disarmed), so new rules see the current one at once
+            self._seen.clear()
+            return i
+
+    def remove(self, rule, owner=None):
+        with self._lock:
+            a = self._arrays
+            if rule < self._n and a['active'][rule] and \
+                    (owner is None or a['owner'][rule] == self._owners.get(owner)):
+                a['active'][rule] = False
+                self._free.append(rule)
+
+    def rules(self, owner) -> pd.DataFrame:
+        """The owner's active rules, indexed by rule id."""
+        with self._lock:
+            a = {k: v[:self._n] for k, v in self._arrays.items()}
+            code = self._owners.get(owner, -1)
+            if owner in self._asked:
+                self._asked[owner] = time.time()
+            idx = np.flatnonzero(a['active'] & (a['owner'] == code))
+            return pd.DataFrame({
+                'coin': [self._names['coin'][c] for c in a['coin'][idx]],
+                'currency': [self._names['currency'][c] for c in a['currency'][idx]],
+                'metric': [METRICS[m] for m in a['metric'][idx]],
+                'above': a['sign'][idx] > 0, 'threshold': a['threshold'][idx],
+            }, index=pd.Index(idx, name='rule'))
+
+    def events(self, owner) -> list:
+        """Alerts fired for `owner` since the last call (oldest first, at most `max_events`)."""
+        with self._lock:
+            code = self._owners.get(owner)
+            if code is None:
+                return []
+            self._asked[owner] = time.time()
+            since, self._cursor[owner] = self._cursor.get(owner, 0), self._seq
+            mine = [out[owners == code] for seq, owners, out in self._batches if seq > since]
+        mine = [m for m in mine if len(m)]
+        if not mine:
+            return []
+        return pd.concat(mine).tail(self.max_events).to_dict(orient='records')
+
+    def _expire(self, now):
+        # Caller holds the lock
+        for owner in [o for o, t in self._asked.items() if now - t > self.idle_after]:
+            if self.alive is not None and self.alive(owner):
+                continue
+            code = self._owners.pop(owner)
+            del self._asked[owner]
+            self._cursor.pop(owner, None)
+            self._names['owner'][code] = None
+            a = self._arrays
+            idx = np.flatnonzero(a['active'][:self._n] & (a['owner'][:self._n] == code))
+            a['active'][idx] = False
+            self._free.extend(idx.tolist())
+
+    def _values(self, df, with_rsi):
+        # (metric, coin + 1) current values and, for crossings, previous ones;
+        # the extra last column stays NaN for coins missing from the snapshot
+        n = len(df)
+        cur = np.full((len(METRICS), n + 1), np.nan)
+        prev = np.full((len(METRICS), n + 1), np.nan)
+        for m, metric in enumerate(METRICS):
+            col = self.columns.get(metric)
+            if col in df.columns:
+                cur[m, :n] = pd.to_numeric(df[col], errors='coerce').to_numpy(np.float64)
+        if with_rsi and self.sparkline in df.columns and n:
+            rows = [np.asarray(r, dtype=np.float64) for r in df[self.sparkline]]
+            if len({len(r) for r in rows}) == 1 and len(rows[0]) > 2:
+                y = rsi(np.stack(rows))[0]['']
+                m = METRICS.index('rsi')
+                cur[m, :n], prev[m, :n] = y[:, -1], y[:, -2]
+        return cur, prev
+
+    def evaluate(self, snap, now=None, source=None) -> pd.DataFrame:
+        """Check every rule against `snap` once per (source, currency, version); returns what fired.
+
+        `source` names the poller `snap` came from: pollers count versions
+        independently, so one's version says nothing about another's.
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            self._expire(now)
+            key = (source, snap.currency)
+            if self._seen.get(key) == snap.version or not self._n:
+                return pd.DataFrame(columns=EVENT_COLUMNS)
+            self._seen[key] = snap.version
+            cur_code = self._currencies.get(snap.currency)
+            if cur_code is None:
+                return pd.DataFrame(columns=EVENT_COLUMNS)
+
+            n = self._n
+            a = {k: v[:n] for k, v in self._arrays.items()}
+            live = a['active'] & (a['currency'] == cur_code)
+            df = snap.df
+            value, prev = self._values(df, with_rsi=(live & a['crossing']).any())
+            if self._coin_index is None:
+                self._coin_index = pd.Index(self._names['coin'])
+            codes = self._coin_index.get_indexer(df['id'])
+            row_of = np.full(len(self._coins), len(df), dtype=np.int64)
+            known = codes >= 0
+            row_of[codes[known]] = np.flatnonzero(known)
+
+            # Signed distance past the threshold: >= 0 is on the alert side
+            # (NaN, so never, for coins or metrics the snapshot lacks)
+            flat = a['metric'] * value.shape[1] + row_of[a['coin']]
+            thr, sign = a['threshold'], a['sign']
+            d = (value.ravel().take(flat) - thr) * sign
+            with np.errstate(invalid='ignore'):
+                cond = live & (d >= 0)
+                if a['crossing'].any():
+                    before = (prev.ravel().take(flat) - thr) * sign
+                    cond &= ~a['crossing'] | (before < 0)
+                # Re-arm once a watched condition clears
+                a['armed'][live & (d == d) & ~cond] = True
+            fire = cond & a['armed'] & (now - a['last_fired'] >= a['cooldown'])
+            idx = np.flatnonzero(fire)
+            if not len(idx):
+                return pd.DataFrame(columns=EVENT_COLUMNS)
+            a['armed'][idx] = False
+            a['last_fired'][idx] = now
+            coins = np.asarray(self._names['coin'], dtype=object)
+            out = pd.DataFrame({
+                'rule': idx, 'coin': coins[a['coin'][idx]], 'currency': snap.currency,
+                'metric': np.asarray(METRICS, dtype=object)[a['metric'][idx]], 'above': sign[idx] > 0,
+                'threshold': thr[idx], 'value': thr[idx] + d[idx] * sign[idx], 'at': now,
+            }, columns=EVENT_COLUMNS)
+            # Owners pick their rows out of the batch when they next ask
+            self._seq += 1
+            self._batches.append((self._seq, a['owner'][idx], out))
+            return out
@@ -0,0 +1,304 @@
+import gzip
+import hashlib
+import json
+import math
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+from flask import Flask, Response, abort, request
+from flask_caching import Cache
+from flask_cors import CORS
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+import market_schema
+import telemetry
+from cg_client import CoinGeckoClient
+from history_store import HistoryStore, tier
+from indicators import INDICATORS, IndicatorEngine
+
+# ========================
+# LOCAL MARKET API
+# ========================
+# A small JSON API over the same data the apps show: market snapshots, coin
+# history and indicators, plus a CoinGecko-compatible passthrough under /v3/
+# for the endpoints the apps call (point COINGECKO_API_URL at it and both
+# Streamlit apps read through it).
+#
+# Payloads live in a file-system cache every gunicorn worker shares. A stale
+# entry is refilled by one worker at a time (a per-key file lock), the others
+# keep serving the stale copy meanwhile, so N workers still make one upstream
+# call per key and TTL. Responses carry an ETag per content coding (304 on
+# If-None-Match), are gzipped when the client accepts it, and `?fields=a,b` projects record lists.
+#
+#   gunicorn -w 4 -b 127.0.0.1:8000 api:app
+
+API_CACHE_DIR = os.environ.get(
+    'API_CACHE_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'api'))
+PORT = int(os.environ.get('API_PORT', 8000))
+# Seconds an entry is fresh; stale entries are still served while refilling,
+# or on upstream errors, for up to STALE_FOR times as long
+# The /v3/ passthrough only serves the CoinGecko endpoints the apps call, so
+# it can't spend the shared rate budget on arbitrary upstream paths
+PASSTHROUGH = {
+    'simple/price': 10, 'coins/markets': 30, 'coins/{id}/market_chart': 60,
+    'coins/{id}/market_chart/range': 60, 'exchange_rates': 300,
+    'coins/list': 3600, 'simple/supported_vs_currencies': 3600,
+}
+TTL = {'markets': 30, 'history': 60, 'indicators': 60, **PASSTHROUGH}
+DEFAULT_TTL = 60
+STALE_FOR = 10
+# Bodies smaller than this aren't worth compressing
+GZIP_MIN = 1024
+MARKET_PARAMS = {'per_page': 250, 'price_change_percentage': '1h,24h,7d,30d'}
+# Coin ids and currencies end up in history file paths
+COIN_ID = re.compile(r'[a-z0-9-]+')
+# Browser origins allowed to call the API (the Streamlit apps by default)
+CORS_ORIGINS = [o for o in os.environ.get(
+    'API_CORS_ORIGINS', 'http://localhost:8501,http://127.0.0.1:8501').split(',') if o]
+
+
+def _encode(payload):
+    body = json.dumps(payload, separators=(',', ':'), allow_nan=False).encode()
+    return body, hashlib.blake2b(body, digest_size=16).hexdigest()
+
+
+def _finite(values):
+    # NaN warm-up values become null (JSON has no NaN)
+    arr = np.asarray(values, dtype=np.float64)
+    return np.where(np.isfinite(arr), arr, None).tolist()
+
+
+def _records(df):
+    df = df.astype(object).where(df.notna(), None)
+    return df.to_dict(orient='records')
+
+
+def _project(payload, fields):
+    # `fields` keeps only those keys of every record in a list of records
+    if isinstance(payload, list):
+        return [{k: r[k] for k in fields if k in r} if isinstance(r, dict) else r for r in payload]
+    if isinstance(payload, dict):
+        return {k: _project(v, fields) if isinstance(v, list) else v for k, v in payload.items()}
+    return payload
+
+
+class SharedCache:
+    def __init__(self, cache, lock_dir):
+        self.cache = cache
+        self.lock_dir = lock_dir
+        self._locks = {}
+        self._guard = threading.Lock()
+        os.makedirs(lock_dir, exist_ok=True)
+
+    def _lock(self, key):
+        # A thread lock per key inside the worker, a file lock across workers
+        with self._guard:
+            lock = self._locks.setdefault(key, threading.Lock())
+        name = hashlib.blake2b(key.encode(), digest_size=12).hexdigest()
+        return lock, os.path.join(self.lock_dir, name + '.lock')
+
+    def _acquire(self, key, blocking):
+        lock, path = self._lock(key)
+        if not lock.acquire(blocking):
+            return None
+        if fcntl is None:
+            return lock, None
+        f = open(path, 'w')
+        try:
+            fcntl.flock(f, fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+        except OSError:
+            f.close()
+            lock.release()
+            return None
+        return lock, f
+
+    @staticmethod
+    def _release(held):
+        lock, f = held
+        if f is not None:
+            fcntl.flock(f, fcntl.LOCK_UN)
+            f.close()
+        lock.release()
+
+    def get(self, key, ttl, compute):
+        """(entry, state): the cached entry for `key`, refilled by `compute()` when stale."""
+        label = 'api:' + key.split(':', 1)[0]
+        telemetry.inc('cache_requests_total', (label, 'call'))
+        entry = self.cache.get(key)
+        if entry is not None and time.time() - entry['at'] < ttl:
+            return entry, 'hit'
+        # Somebody else refilling: the stale copy is good enough for now
+        held = self._acquire(key, blocking=entry is None)
+        if held is None:
+            return entry, 'stale'
+        try:
+            fresh = self.cache.get(key)
+            if fresh is not None and time.time() - fresh['at'] < ttl:
+                return fresh, 'hit'
+            telemetry.inc('cache_requests_total', (label, 'miss'))
+            try:
+                payload = compute()
+            except Exception:
+                if entry is None:
+                    raise
+                return entry, 'stale'
+            body, etag = _encode(payload)
+            entry = {'at': time.time(), 'payload': payload, 'body': body, 'etag': etag,
+                     'gzip': gzip.compress(body, 6) if len(body) >= GZIP_MIN else None}
+            self.cache.set(key, entry, timeout=int(ttl * STALE_FOR))
+            return entry, 'miss'
+        finally:
+            self._release(held)
+
+
+class Projections:
+    # Encoded projected bodies per (entry ETag, fields), so repeated projected
+    # requests on an unchanged entry skip the re-encode
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, entry, fields):
+        key = (entry['etag'], fields)
+        with self._lock:
+            hit = self._entries.get(key)
+            if hit is not None:
+                self._entries.move_to_end(key)
+                return hit
+        body, etag = _encode(_project(entry['payload'], fields))
+        out = {'at': entry['at'], 'body': body, 'etag': etag,
+               'gzip': gzip.compress(body, 6) if len(body) >= GZIP_MIN else None}
+        with self._lock:
+            self._entries[key] = out
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return out
+
+
+def create_app(cg=None, cache_dir=API_CACHE_DIR):
+    app = Flask(__name__)
+    CORS(app, origins=CORS_ORIGINS)
+    cache = Cache(app, config={'CACHE_TYPE': 'FileSystemCache', 'CACHE_DIR': os.path.join(cache_dir, 'entries'),
+                               'CACHE_THRESHOLD': 5000, 'CACHE_DEFAULT_TIMEOUT': DEFAULT_TTL * STALE_FOR})
+    shared = SharedCache(cache, os.path.join(cache_dir, 'locks'))
+    projections = Projections()
+    cg = cg or CoinGeckoClient()
+    history = HistoryStore(cg)
+    engine = IndicatorEngine()
+
+    def respond(key, ttl, compute):
+        with telemetry.stage('api:' + key.split(':', 1)[0]):
+            entry, state = shared.get(key, ttl, compute)
+            fields = request.args.get('fields')
+            if fields:
+                entry = projections.get(entry, tuple(f for f in fields.split(',') if f))
+            gzipped = entry['gzip'] is not None and 'gzip' in request.accept_encodings
+            resp = Response(entry['gzip'] if gzipped else entry['body'], mimetype='application/json')
+            # Each content coding is its own representation with its own
+            # strong ETag
+            resp.set_etag(entry['etag'] + ('-gzip' if gzipped else ''))
+            if gzipped:
+                resp.headers['Content-Encoding'] = 'gzip'
+            resp.headers['X-Cache'] = state
+            resp.headers['Vary'] = 'Accept-Encoding'
+            resp.cache_control.max_age = max(0, int(ttl - (time.time() - entry['at'])))
+            return resp.make_conditional(request)
+
+    def supported(cur):
+        # Read through the passthrough's own entry, so both share one call
+        entry, _ = shared.get('v3:simple/supported_vs_currencies?', PASSTHROUGH['simple/supported_vs_currencies'],
+                              cg.get_supported_vs_currencies)
+        if cur not in entry['payload']:
+            abort(400, f'unsupported currency {cur!r}')
+        return cur
+
+    def currency():
+        return supported(request.args.get('currency', 'usd').lower())
+
+    def coin_id(coin):
+        if not COIN_ID.fullmatch(coin):
+            abort(400, f'invalid coin id {coin!r}')
+        return coin
+
+    def window():
+        days = request.args.get('days', 30, type=float)
+        if not math.isfinite(days) or days <= 0:
+            abort(400, 'days must be a positive number')
+        return days
+
+    @app.get('/markets/<vs>')
+    def markets(vs):
+        vs = supported(vs.lower())
+
+        def compute():
+            rows = cg.get_coins_markets(vs_currency=vs, **MARKET_PARAMS)
+            df = market_schema.compact(pd.DataFrame(rows))
+            return {'currency': vs, 'fetched_at': time.time(), 'coins': _records(df)}
+        return respond(f'markets:{vs}', TTL['markets'], compute)
+
+    @app.get('/coins/<coin>/history')
+    def coin_history(coin):
+        coin, cur, days = coin_id(coin), currency(), window()
+
+        def compute():
+            start = time.time() - days * 86400
+            points = history.refresh(coin, cur, days)
+            points = points[np.searchsorted(points['ts'], int(start * 1000)):]
+            return {'id': coin, 'currency': cur, 'days': days,
+                    'timestamps': points['ts'].tolist(), 'prices': _finite(points['price'])}
+        return respond(f'history:{coin}:{cur}:{days:g}', TTL['history'], compute)
+
+    @app.get('/coins/<coin>/indicators')
+    def coin_indicators(coin):
+        coin, cur, days = coin_id(coin), currency(), window()
+        names = tuple(request.args.get('names', ','.join(INDICATORS)).split(','))
+        if not set(names) <= set(INDICATORS):
+            abort(400, f'unknown indicator; choose from {", ".join(INDICATORS)}')
+
+        def compute():
+            # Computed over everything stored, then cut to the window, so the
+            # first values of the window are already warmed up
+            start = time.time() - days * 86400
+            points = history.refresh(coin, cur, days)
+            values = engine.compute(coin, cur, points['ts'], points['price'], names, tier(days))
+            i = int(np.searchsorted(points['ts'], int(start * 1000)))
+            return {'id': coin, 'currency': cur, 'days': days,
+                    'timestamps': points['ts'][i:].tolist(),
+                    'indicators': {k: _finite(v[i:]) for k, v in values.items()}}
+        return respond(f'indicators:{coin}:{cur}:{days:g}:{",".join(names)}', TTL['indicators'], compute)
+
+    @app.get('/v3/<path:path>')
+    def passthrough(path):
+        if telemetry.endpoint(path) not in PASSTHROUGH:
+            abort(404, f'not proxied; /v3/ serves {", ".join(PASSTHROUGH)}')
+        params = {k: v for k, v in sorted(request.args.items()) if k != 'fields'}
+        key = 'v3:' + path + '?' + '&'.join(f'{k}={v}' for k, v in params.items())
+        return respond(key, PASSTHROUGH[telemetry.endpoint(path)], lambda: cg.get(path, **params))
+
+    @app.get('/metrics')
+    def metrics():
+        return Response(telemetry.render(), mimetype='text/plain; version=0.0.4')
+
+    @app.errorhandler(Exception)
+    def upstream_error(e):
+        # Errors with nothing cached to fall back on
+        code = getattr(e, 'code', None) or getattr(getattr(e, 'response', None), 'status_code', None) or 502
+        return Response(json.dumps({'error': str(e)}), status=code, mimetype='application/json')
+
+    return app
+
+
+app = create_app()
+
+if __name__ == '__main__':
+    app.run(port=PORT, threaded=True)
@@ -0,0 +1,103 @@
+import hashlib
+import json
+import os
+import threading
+import time
+
+import requests
+
+import atomic_file
+
+# ========================
+# REMOTE ASSET CACHE
+# ========================
+# Remote JSON/images (Lottie animations, logos) are kept on disk next to their
+# ETag/Last-Modified. Within `max_age` a request never leaves the process;
+# after that one conditional GET revalidates, and if the host is unreachable
+# the last good copy keeps being served.
+
+ASSET_DIR = os.environ.get(
+    'ASSET_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'assets'))
+MAX_AGE = 24 * 3600
+# After a failed fetch, wait this long before trying the host again
+RETRY_AFTER = 300
+
+
+class AssetCache:
+    def __init__(self, root=ASSET_DIR, max_age=MAX_AGE, timeout=10):
+        self.root = root
+        self.max_age = max_age
+        self.timeout = timeout
+        self._memory = {}
+        self._lock = threading.Lock()
+
+    def _paths(self, url):
+        key = hashlib.sha1(url.encode()).hexdigest()
+        return os.path.join(self.root, key), os.path.join(self.root, key + '.json')
+
+    def _read(self, url):
+        body_path, meta_path = self._paths(url)
+        try:
+            with open(meta_path) as f:
+                meta = json.load(f)
+            with open(body_path, 'rb') as f:
+                return f.read(), meta
+        except (OSError, ValueError):
+            return None, None
+
+    def _write(self, url, body, meta):
+        body_path, meta_path = self._paths(url)
+        os.makedirs(self.root, exist_ok=True)
+        if body is not None:
+            atomic_file.replace(body_path, lambda f: f.write(body), 'wb')
+        atomic_file.replace(meta_path, lambda f: json.dump(meta, f), 'w')
+
+    def get(self, url):
+        """Bytes for `url`, or None if it has never been fetched successfully."""
+        with self._lock:
+            hit = self._memory.get(url)
+        if hit and time.time() - hit[1]['fetched'] < self.max_age:
+            return hit[0]
+        body, meta = hit or self._read(url)
+        if body is None or time.time() - meta['fetched'] >= self.max_age:
+            headers = {}
+            if meta and meta.get('etag'):
+                headers['If-None-Match'] = meta['etag']
+            if meta and meta.get('last_modified'):
+                headers['If-Modified-Since'] = meta['last_modified']
+            try:
+                r = requests.get(url, headers=headers, timeout=self.timeout)
+                if r.status_code == 304 and body is not None:
+                    meta['fetched'] = time.time()
+                    self._write(url, None, meta)
+                else:
+                    r.raise_for_status()
+                    body = r.content
+                    meta = {'fetched': time.time(), 'etag': r.headers.get('ETag'),
+                            'last_modified': r.headers.get('Last-Modified')}
+                    self._write(url, body, meta)
+            except (requests.RequestException, OSError):
+                # Keep serving the last good copy (or nothing) without
+                # hitting the host on every rerun
+                meta = dict(meta or {}, fetched=time.time() - self.max_age + RETRY_AFTER)
+        with self._lock:
+            self._memory[url] = (body, meta)
+        return body
+
+    def get_json(self, url):
+        body = self.get(url)
+        try:
+            return json.loads(body) if body is not None else None
+        except ValueError:
+            return None
+
+
+_default = AssetCache()
+
+
+def load_json(url):
+    return _default.get_json(url)
+
+
+def load_bytes(url):
+    return _default.get(url)
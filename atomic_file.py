@@ -0,0 +1,39 @@
+import os
+import tempfile
+
+# ========================
+# ATOMIC FILE REPLACE
+# ========================
+# The on-disk caches (history, snapshots, the snapshot log, assets) are
+# shared by every app and API process on the host. Each write goes to its own
+# temp file next to the target, is flushed to disk and then swapped in with
+# one rename, so readers see the old file or the new one, never a torn one,
+# and concurrent writers never share a temp file.
+
+
+def replace(path, write, mode=None):
+    """Atomically replace `path` with what `write` produces.
+
+    With `mode` ('w' / 'wb'), `write` gets the open temp file; without it,
+    `write` gets the temp file's path (for writers that open it themselves).
+    The temp file is removed if anything fails.
+    """
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    try:
+        if mode is None:
+            os.close(fd)
+            write(tmp)
+            fd = os.open(tmp, os.O_RDONLY)
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+        else:
+            with os.fdopen(fd, mode) as f:
+                write(f)
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
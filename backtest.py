@@ -0,0 +1,228 @@
+import multiprocessing as mp
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+from indicators import bollinger, macd, rsi, sma
+
+# ========================
+# STRATEGY BACKTESTER
+# ========================
+# Runs one long/flat rule strategy over every coin at once. Prices are a
+# (coins, bars) matrix on a common time grid; each strategy is vectorized
+# along the bar axis (the indicator kernels already take matrices), so a
+# worker handles a block of coins per call. The matrix sits in shared memory
+# and workers of a persistent process pool attach to it by name, so fanning
+# out copies nothing but row ranges and per-coin metrics. BacktestJob runs
+# the history loading and the pool on a background thread for the app.
+
+# name -> (label, default params)
+STRATEGIES = {
+    'sma_cross': ('SMA crossover', {'fast': 20, 'slow': 50}),
+    'rsi': ('RSI thresholds', {'n': 14, 'lower': 30.0, 'upper': 70.0}),
+    'macd': ('MACD above zero', {'fast': 12, 'slow': 26}),
+    'bollinger': ('Bollinger reversion', {'n': 20, 'k': 2.0}),
+}
+# Cost of changing position, as a fraction of the traded value
+FEE = 0.001
+METRIC_COLUMNS = ['Return %', 'Buy & Hold %', 'Max Drawdown %', 'Sharpe', 'Trades', 'Exposure %']
+# Matrices smaller than this (coins x bars) run in-process: a daily year of
+# 250 coins takes ~50 ms serially, less than shipping it to a pool costs
+POOL_MIN_CELLS = 1_000_000
+
+
+def price_matrix(series, step=None):
+    """(grid ts, (coins, bars) prices) from {coin: (ts ms, prices)}, last price at or before each bar.
+
+    Bars before a coin's first point are NaN. `step` (ms) defaults to the
+    median spacing of the series.
+    """
+    series = {c: (np.asarray(t, dtype=np.int64), np.asarray(p, dtype=np.float64))
+              for c, (t, p) in series.items() if len(t)}
+    if not series:
+        return np.empty(0, dtype=np.int64), np.empty((0, 0))
+    if step is None:
+        gaps = np.concatenate([np.diff(t) for t, _ in series.values()])
+        step = int(np.median(gaps)) if len(gaps) else 86400000
+    start = min(t[0] for t, _ in series.values())
+    end = max(t[-1] for t, _ in series.values())
+    grid = np.arange(end, start - 1, -step)[::-1]
+    out = np.full((len(series), len(grid)), np.nan)
+    for i, (t, p) in enumerate(series.values()):
+        j = np.searchsorted(t, grid, side='right') - 1
+        ok = j >= 0
+        out[i, ok] = p[j[ok]]
+    return grid, out
+
+
+def _ffill(x):
+    # Carry the last non-NaN value forward along the bar axis
+    idx = np.where(np.isnan(x), 0, np.arange(x.shape[-1]))
+    np.maximum.accumulate(idx, axis=-1, out=idx)
+    return np.take_along_axis(x, idx, axis=-1)
+
+
+def _hold(enter, leave):
+    # 1 from an entry bar until the next exit bar, 0 otherwise
+    sig = np.where(enter, 1.0, np.where(leave, 0.0, np.nan))
+    sig[..., 0] = np.where(np.isnan(sig[..., 0]), 0.0, sig[..., 0])
+    return _ffill(sig)
+
+
+def positions(x, strategy, params):
+    """(coins, bars) long/flat positions (0 or 1) decided at each bar's close."""
+    p = {**STRATEGIES[strategy][1], **params}
+    with np.errstate(invalid='ignore'):
+        if strategy == 'sma_cross':
+            pos = sma(x, p['fast'])[0][''] > sma(x, p['slow'])[0]['']
+        elif strategy == 'rsi':
+            r = rsi(x, p['n'])[0]['']
+            pos = _hold(r < p['lower'], r > p['upper'])
+        elif strategy == 'macd':
+            pos = macd(x, p['fast'], p['slow'])[0][''] > 0
+        elif strategy == 'bollinger':
+            bands = bollinger(x, p['n'], p['k'])[0]
+            pos = _hold(x < bands['_Low'], x > (bands['_High'] + bands['_Low']) / 2)
+        else:
+            raise ValueError(f"unknown strategy {strategy!r}; choose from {', '.join(STRATEGIES)}")
+    return np.asarray(pos, dtype=np.float64)
+
+
+def evaluate(prices, strategy, params, bars_per_year, fee=FEE):
+    """Per-coin metrics (dict of arrays) for `strategy` over a (coins, bars) block."""
+    # Each row is shifted to start at its coin's first price, so indicators
+    # warm up on the coin's own history; the bars freed at the end repeat
+    # the last price (zero returns) and are never held. Gaps carry forward.
+    bars = prices.shape[-1]
+    first = np.argmax(~np.isnan(prices), axis=-1)
+    cols = np.arange(bars)
+    x = np.take_along_axis(_ffill(prices), np.minimum(cols + first[:, None], bars - 1), axis=-1)
+    listed = (cols < (bars - first)[:, None]) & ~np.isnan(x)
+    x = np.where(np.isnan(x), 1.0, x)
+    # The last position is kept (at zero return) through the padding rather
+    # than closed, so no exit fee is charged there
+    pos = np.nan_to_num(_ffill(np.where(listed, positions(x, strategy, params), np.nan)))
+    # Trade on the close after the signal: yesterday's position earns today's move
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ret = np.nan_to_num(np.diff(x, axis=-1) / x[:, :-1])
+    held = pos[:, :-1]
+    turnover = np.abs(np.diff(pos, axis=-1, prepend=0.0))[:, :-1]
+    strat = held * ret - fee * turnover
+    equity = np.cumprod(1 + strat, axis=-1)
+    peak = np.maximum.accumulate(np.maximum(equity, 1.0), axis=-1)
+    n = listed.sum(axis=-1) - 1
+    mean = strat.sum(axis=-1) / np.maximum(n, 1)
+    var = (np.square(strat - mean[:, None]) * listed[:, 1:]).sum(axis=-1) / np.maximum(n - 1, 1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        sharpe = np.where(var > 0, mean / np.sqrt(var) * np.sqrt(bars_per_year), np.nan)
+        hold = np.where(listed.any(axis=-1), x[:, -1] / x[:, 0] - 1, np.nan)
+    return {
+        'Return %': 100 * (equity[:, -1] - 1) if equity.shape[-1] else np.zeros(len(x)),
+        'Buy & Hold %': 100 * hold,
+        'Max Drawdown %': 100 * (equity / peak - 1).min(axis=-1, initial=0.0),
+        'Sharpe': sharpe,
+        'Trades': (np.diff(pos, axis=-1, prepend=0.0) > 0).sum(axis=-1),
+        'Exposure %': 100 * (held * listed[:, 1:]).sum(axis=-1) / np.maximum(n, 1),
+    }
+
+
+# ---- process pool over shared memory ----
+
+def _block(name, shape, lo, hi, strategy, params, bars_per_year, fee):
+    # Runs in a worker: evaluate rows lo:hi, then detach, so the segment the
+    # parent unlinks after the run is not kept mapped by idle workers
+    shm = shared_memory.SharedMemory(name=name)
+    try:
+        prices = np.ndarray(shape, dtype=np.float64, buffer=shm.buf)[lo:hi]
+        out = evaluate(prices, strategy, params, bars_per_year, fee)
+        del prices
+    finally:
+        shm.close()
+    return lo, out
+
+
+class Backtester:
+    def __init__(self, workers=None):
+        # Spawned, not forked: the apps run many threads. The pool starts on
+        # first use and is kept, so later runs skip the interpreter start-up
+        self.workers = workers or os.cpu_count() or 1
+        self._pool = None
+        self._lock = threading.Lock()
+
+    def _executor(self):
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(self.workers, mp_context=mp.get_context('spawn'))
+            return self._pool
+
+    def run(self, ids, prices, strategy, params=None, bars_per_year=365, fee=FEE, chunks=None) -> pd.DataFrame:
+        """Ranked metrics table (best Sharpe first) of `strategy` on every row of `prices`."""
+        params = params or {}
+        prices = np.ascontiguousarray(prices, dtype=np.float64)
+        if self.workers == 1 or len(prices) < 2 or prices.size < POOL_MIN_CELLS:
+            return self._table(ids, evaluate(prices, strategy, params, bars_per_year, fee))
+        shm = shared_memory.SharedMemory(create=True, size=max(prices.nbytes, 1))
+        try:
+            np.ndarray(prices.shape, dtype=np.float64, buffer=shm.buf)[:] = prices
+            # A few blocks per worker so an uneven block doesn't idle the rest
+            bounds = np.linspace(0, len(prices), min(len(prices), chunks or 4 * self.workers) + 1).astype(int)
+            futures = [self._executor().submit(_block, shm.name, prices.shape, lo, hi, strategy, params,
+                                               bars_per_year, fee)
+                       for lo, hi in zip(bounds[:-1], bounds[1:]) if hi > lo]
+            parts = dict(f.result() for f in futures)
+        finally:
+            shm.close()
+            shm.unlink()
+        metrics = {k: np.concatenate([parts[lo][k] for lo in sorted(parts)]) for k in METRIC_COLUMNS}
+        return self._table(ids, metrics)
+
+    @staticmethod
+    def _table(ids, metrics):
+        out = pd.DataFrame(metrics, index=pd.Index(list(ids), name='id'), columns=METRIC_COLUMNS)
+        return out.sort_values('Sharpe', ascending=False, na_position='last')
+
+    def shutdown(self):
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(cancel_futures=True)
+                self._pool = None
+
+
+class BacktestJob:
+    """One backtest on a background thread: load every coin's history, then run.
+
+    `load(id)` returns (ts ms, prices) or None; `loaded` / `total` report the
+    loading progress and `done` turns true with `result` or `error` set.
+    """
+
+    def __init__(self, backtester, load, ids, strategy, params, step, bars_per_year, loaders=8):
+        self.total, self.loaded = len(ids), 0
+        self.result = self.error = None
+        self._done = threading.Event()
+        threading.Thread(target=self._run, daemon=True,
+                         args=(backtester, load, list(ids), strategy, params, step, bars_per_year, loaders)).start()
+
+    @property
+    def done(self):
+        return self._done.is_set()
+
+    def _run(self, backtester, load, ids, strategy, params, step, bars_per_year, loaders):
+        try:
+            found = {}
+            with ThreadPoolExecutor(loaders) as pool:
+                for f in as_completed([pool.submit(lambda c=c: (c, load(c))) for c in ids]):
+                    cid, s = f.result()
+                    if s is not None:
+                        found[cid] = s
+                    self.loaded += 1
+            series = {cid: found[cid] for cid in ids if cid in found}
+            _, prices = price_matrix(series, step)
+            self.result = backtester.run(list(series), prices, strategy, params, bars_per_year=bars_per_year)
+        except Exception as e:
+            self.error = e
+        finally:
+            self._done.set()
@@ -0,0 +1,65 @@
+# Scaling of the process-pool backtester on synthetic prices: runs every
+# strategy over 250 coins x 365 days with 1, 2, 4, ... workers, checks the
+# pooled results against the single-process pass and reports the speedup.
+#   python benchmarks/backtest_bench.py [--coins 250] [--days 365] [--hourly] [--workers 1 2 4 8]
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import backtest  # noqa: E402
+from backtest import STRATEGIES, Backtester  # noqa: E402
+
+
+def synthetic_prices(coins, bars, seed=0):
+    rng = np.random.default_rng(seed)
+    x = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, (coins, bars)), axis=1))
+    # A tenth of the coins listed part-way through the window
+    late = rng.choice(coins, coins // 10, replace=False)
+    for i, start in zip(late, rng.integers(1, bars // 2, len(late))):
+        x[i, :start] = np.nan
+    return x
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--coins', type=int, default=250)
+    ap.add_argument('--days', type=int, default=365)
+    ap.add_argument('--hourly', action='store_true', help="hourly bars instead of daily")
+    ap.add_argument('--workers', type=int, nargs='+')
+    ap.add_argument('--repeat', type=int, default=3)
+    args = ap.parse_args()
+
+    per_day = 24 if args.hourly else 1
+    prices = synthetic_prices(args.coins, args.days * per_day)
+    ids = [f'coin-{i}' for i in range(args.coins)]
+    cores = os.cpu_count() or 1
+    workers = args.workers or sorted({1, *[w for w in (2, 4, 8, 16) if w <= cores], cores})
+
+    # Measure the pool itself, even where the app would run in-process
+    backtest.POOL_MIN_CELLS = 0
+    reference = {s: Backtester(1).run(ids, prices, s, bars_per_year=365 * per_day) for s in STRATEGIES}
+    print(f"{args.coins} coins x {prices.shape[1]} bars, {len(STRATEGIES)} strategies, {cores} cores")
+    print(f"{'workers':>8}{'time':>10}{'speedup':>9}{'efficiency':>12}")
+    base = None
+    for w in workers:
+        bt = Backtester(w)
+        bt.run(ids, prices, 'sma_cross', bars_per_year=365 * per_day)  # start the pool
+        best = float('inf')
+        for _ in range(args.repeat):
+            t = time.perf_counter()
+            out = {s: bt.run(ids, prices, s, bars_per_year=365 * per_day) for s in STRATEGIES}
+            best = min(best, time.perf_counter() - t)
+        bt.shutdown()
+        for s, table in out.items():
+            ref = reference[s].loc[table.index]
+            assert np.allclose(table.to_numpy(float), ref.to_numpy(float), equal_nan=True), s
+        base = base or best
+        print(f"{w:>8}{best * 1000:>8.0f}ms{base / best:>8.2f}x{base / best / w:>11.0%}")
+
+
+if __name__ == '__main__':
+    main()
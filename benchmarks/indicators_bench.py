@@ -0,0 +1,95 @@
+# Validates indicators.py against `ta` and times both on 250 coins x 365 days.
+#   python benchmarks/indicators_bench.py [--coins 250] [--days 365] [--hourly]
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+import ta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from indicators import IndicatorEngine, columns, compute, INDICATORS  # noqa: E402
+
+
+def ta_reference(close):
+    s = pd.Series(close)
+    return {
+        'SMA_20': ta.trend.sma_indicator(s, window=20),
+        'SMA_50': ta.trend.sma_indicator(s, window=50),
+        'RSI': ta.momentum.rsi(s, window=14),
+        'MACD': ta.trend.macd(s),
+        'Bollinger_High': ta.volatility.bollinger_hband(s),
+        'Bollinger_Low': ta.volatility.bollinger_lband(s),
+    }
+
+
+def timed(fn, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        t = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t)
+    return best
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--coins', type=int, default=250)
+    ap.add_argument('--days', type=int, default=365)
+    ap.add_argument('--hourly', action='store_true', help="24 points per day instead of 1")
+    args = ap.parse_args()
+
+    points = args.days * (24 if args.hourly else 1)
+    rng = np.random.default_rng(42)
+    start = rng.uniform(0.01, 60000, (args.coins, 1))
+    prices = start * np.exp(np.cumsum(rng.normal(0, 0.02, (args.coins, points)), axis=1))
+    names = tuple(INDICATORS)
+
+    # Numerical check, coin by coin; errors are relative to the coin's price
+    # scale (RSI: its 0-100 range) because MACD crosses zero
+    batch = compute(prices, names)
+    worst = {c: 0.0 for c in columns(names)}
+    for i in range(args.coins):
+        scale = float(np.abs(prices[i]).max())
+        for c, ref in ta_reference(prices[i]).items():
+            a, b = batch[c][i], ref.to_numpy()
+            if not np.array_equal(np.isnan(a), np.isnan(b)):
+                sys.exit(f"{c}: warm-up NaNs differ from ta for coin {i}")
+            ok = ~np.isnan(b)
+            worst[c] = max(worst[c], float(np.max(np.abs(a[ok] - b[ok]))) / (100.0 if c == 'RSI' else scale))
+    for c, err in worst.items():
+        print(f"{c:<16} max err vs ta {err:.2e} (relative to scale)")
+        if err > 1e-8:
+            sys.exit(f"{c}: exceeds tolerance")
+
+    # One extra point for every coin on an engine already holding the batch;
+    # the extended result must match a cold pass over the grown matrix
+    ts = np.arange(points + 1)
+    grown = np.concatenate([prices, prices[:, -1:] * 1.001], axis=1)
+    engine = IndicatorEngine()
+
+    def warm():
+        engine.compute('all', 'usd', ts[:points], prices, names)
+        t = time.perf_counter()
+        out = engine.compute('all', 'usd', ts, grown, names)
+        return time.perf_counter() - t, out
+
+    t_warm = min(warm()[0] for _ in range(3))
+    out = warm()[1]
+    cold = compute(grown, names)
+    for c in columns(names):
+        if not np.allclose(out[c], cold[c], rtol=1e-9, atol=0, equal_nan=True):
+            sys.exit(f"{c}: incremental result differs from a cold pass")
+
+    t_ta = timed(lambda: [ta_reference(p) for p in prices], repeat=1)
+    t_cold = timed(lambda: compute(prices, names))
+    print(f"\n{args.coins} coins x {points} points")
+    print(f"ta, per coin        {t_ta * 1000:9.1f} ms")
+    print(f"numpy, one batch    {t_cold * 1000:9.1f} ms  ({t_ta / t_cold:.0f}x)")
+    print(f"engine, +1 point    {t_warm * 1000:9.1f} ms  ({t_cold / t_warm:.0f}x faster than the batch, matches it)")
+
+
+if __name__ == '__main__':
+    main()
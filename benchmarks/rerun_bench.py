@@ -0,0 +1,140 @@
+# End-to-end rerun benchmark: drives full script reruns of both apps headlessly
+# against the local stand-in (a recorded cassette or the synthetic market),
+# optionally with injected latency and 429s, and reports rerun time
+# percentiles, peak memory and the upstream calls each app made. With
+# --baseline it compares against an earlier --save and fails on regressions.
+#   python benchmarks/rerun_bench.py [--reruns 30] [--cassette DIR] [--latency 0.1] [--error-rate 0.05]
+#   python benchmarks/rerun_bench.py --save base.json   ...later...   --baseline base.json
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APPS = ['tracker_app_final.py', 'tracker app.py']
+# Metrics compared against a baseline, with the slack each one gets
+CHECKS = {'cold_ms': 0.25, 'p50_ms': 0.25, 'p95_ms': 0.5, 'peak_mb': 0.2, 'upstream_calls': 0.0}
+
+
+def _pct(xs, q):
+    xs = sorted(xs)
+    return xs[min(len(xs) - 1, int(q * len(xs)))]
+
+
+def bench_one(app, args):
+    sys.path.insert(0, ROOT)
+    from benchmarks.standin import StandIn
+    standin = StandIn(args.coins, latency=args.latency, jitter=args.jitter, rate_limit=args.rate_limit,
+                      error_rate=args.error_rate, cassette=args.cassette).start()
+    cache = tempfile.mkdtemp()
+    os.environ.update(COINGECKO_API_URL=standin.url, COINGECKO_RATE='1000', COINGECKO_BURST='1000',
+                      HISTORY_DIR=os.path.join(cache, 'history'), ASSET_DIR=os.path.join(cache, 'assets'),
+                      SNAPSHOT_DIR=os.path.join(cache, 'snapshots'), TELEMETRY_PORT='0')
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(os.path.abspath(app), default_timeout=300)
+    t = time.perf_counter()
+    at.run()
+    cold = time.perf_counter() - t
+    times = []
+    for _ in range(args.reruns):
+        time.sleep(args.pause)
+        t = time.perf_counter()
+        at.run()
+        times.append(time.perf_counter() - t)
+    # Memory in its own pass: tracemalloc would slow the timed reruns
+    tracemalloc.start()
+    for _ in range(min(5, args.reruns)):
+        at.run()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    calls = standin.report()
+    return {
+        'app': os.path.basename(app),
+        'cold_ms': cold * 1000,
+        'p50_ms': _pct(times, 0.5) * 1000 if times else float('nan'),
+        'p95_ms': _pct(times, 0.95) * 1000 if times else float('nan'),
+        'peak_mb': peak / 2**20,
+        'rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024 if resource else float('nan'),
+        'upstream_calls': sum(n['served'] for n in calls.values()),
+        'throttled': sum(n['429'] for n in calls.values()),
+        'endpoints': calls,
+        'errors': [str(e.value) for e in at.exception],
+    }
+
+
+def regressions(results, baseline):
+    out = []
+    for r in results:
+        base = baseline.get(r['app'])
+        if not base:
+            continue
+        for metric, slack in CHECKS.items():
+            if r[metric] > base[metric] * (1 + slack) + (1 if metric == 'upstream_calls' else 0):
+                out.append(f"{r['app']}: {metric} {r[metric]:.1f} vs {base[metric]:.1f} (+{slack:.0%} allowed)")
+    return out
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--reruns', type=int, default=30)
+    ap.add_argument('--pause', type=float, default=0.0, help="seconds between reruns (lets pollers tick)")
+    ap.add_argument('--app', action='append', help="app script (default: both apps)")
+    ap.add_argument('--cassette', help="replay recorded responses (see benchmarks/standin.py record)")
+    ap.add_argument('--coins', type=int, default=2000, help="synthetic market size without a cassette")
+    ap.add_argument('--latency', type=float, default=0.0)
+    ap.add_argument('--jitter', type=float, default=0.0)
+    ap.add_argument('--rate-limit', type=float)
+    ap.add_argument('--error-rate', type=float, default=0.0)
+    ap.add_argument('--save', help="write results as JSON (a later --baseline)")
+    ap.add_argument('--baseline', help="JSON from --save; exit 1 on regressions")
+    ap.add_argument('--child', help=argparse.SUPPRESS)
+    args = ap.parse_args()
+
+    if args.child:
+        print(json.dumps(bench_one(args.child, args)))
+        return
+    options = ['--reruns', args.reruns, '--pause', args.pause, '--coins', args.coins, '--latency', args.latency,
+               '--jitter', args.jitter, '--error-rate', args.error_rate]
+    options += ['--cassette', os.path.abspath(args.cassette)] if args.cassette else []
+    options += ['--rate-limit', args.rate_limit] if args.rate_limit else []
+    results = []
+    print(f"{'app':<24}{'cold':>9}{'p50':>9}{'p95':>9}{'peak':>9}{'rss':>9}{'calls':>7}{'429s':>6}")
+    for app in args.app or [os.path.join(ROOT, a) for a in APPS]:
+        cmd = [sys.executable, __file__, '--child', app, *map(str, options)]
+        out = subprocess.run(cmd, capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(app)))
+        lines = [l for l in out.stdout.splitlines() if l.startswith('{')]
+        if not lines:
+            print(f"{os.path.basename(app)}: failed\n{out.stderr[-2000:]}")
+            continue
+        r = json.loads(lines[-1])
+        results.append(r)
+        print(f"{r['app']:<24}{r['cold_ms']:>7.0f}ms{r['p50_ms']:>7.0f}ms{r['p95_ms']:>7.0f}ms"
+              f"{r['peak_mb']:>7.1f}MB{r['rss_mb']:>7.0f}MB{r['upstream_calls']:>7}{r['throttled']:>6}")
+        for ep, n in r['endpoints'].items():
+            print(f"    {ep:<36}{n['served']:>5}{n['429']:>6}")
+        for e in r['errors']:
+            print(f"  error: {e}")
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump({r['app']: r for r in results}, f, indent=1)
+    if args.baseline:
+        with open(args.baseline) as f:
+            found = regressions(results, json.load(f))
+        for line in found:
+            print(f"REGRESSION {line}")
+        sys.exit(1 if found else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,266 @@
+# Local stand-in for the CoinGecko endpoints the apps call, so the apps and
+# benchmarks run offline and deterministically. Responses come from a
+# recorded cassette when one is given, otherwise from a synthetic market.
+# Latency, jitter and 429s (a server-side rate limit or a random share of
+# requests) can be injected to exercise the client's retry path.
+#
+#   python benchmarks/standin.py record --cassette DIR   # proxy to CoinGecko, keep responses
+#   python benchmarks/standin.py serve [--cassette DIR] [--latency 0.2] [--error-rate 0.05]
+#   COINGECKO_API_URL=<printed url> streamlit run tracker_app_final.py
+import argparse
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+import requests
+
+RATES = {'btc': 1.0, 'usd': 60000.0, 'eur': 55000.0, 'gbp': 47000.0, 'inr': 5000000.0, 'jpy': 9000000.0}
+
+
+def synthetic_market(n, seed=7):
+    rng = np.random.default_rng(seed)
+    caps = np.sort(rng.lognormal(16, 3, n))[::-1]
+    names = {0: ('bitcoin', 'btc', 'Bitcoin'), 1: ('ethereum', 'eth', 'Ethereum')}
+    coins = []
+    for i in range(n):
+        cid, sym, name = names.get(i, (f'coin-{i}', f'c{i}', f'Coin {i}'))
+        coins.append({
+            'id': cid, 'symbol': sym, 'name': name,
+            'image': f'https://assets.example/coins/{i}.png',
+            'current_price': float(rng.lognormal(0, 3)), 'market_cap': float(caps[i]),
+            'market_cap_rank': i + 1, 'total_volume': float(caps[i] * 0.05),
+            'price_change_percentage_24h': float(rng.normal(0, 5)),
+            'price_change_percentage_1h_in_currency': float(rng.normal(0, 1)),
+            'price_change_percentage_24h_in_currency': float(rng.normal(0, 5)),
+            'price_change_percentage_7d_in_currency': float(rng.normal(0, 12)),
+            'price_change_percentage_30d_in_currency': float(rng.normal(0, 20)),
+            'ath': 1.0, 'roi': None, 'last_updated': '2024-01-01T00:00:00.000Z',
+            'sparkline_in_7d': {'price': np.exp(np.cumsum(rng.normal(0, 0.01, 168))).round(6).tolist()},
+        })
+    return coins
+
+
+def _history(start, end):
+    # 5-minutely up to a day, hourly up to 90 days, daily beyond (as upstream)
+    step = 300 if end - start <= 86400 else 3600 if end - start <= 90 * 86400 else 86400
+    ts = np.arange(start, end, step)
+    return {'prices': [[int(t * 1000), float(100 + 10 * np.sin(t / 50000))] for t in ts]}
+
+
+def _endpoint(path):
+    # coins/<id>/... counted as one endpoint, as in the app telemetry
+    parts = path.split('/')
+    if parts[0] == 'coins' and len(parts) > 2:
+        parts[1] = '{id}'
+    return '/'.join(parts)
+
+
+class Cassette:
+    # One JSON file per recorded request. History ranges are keyed without
+    # their from/to and replayed shifted to the requested end, so a capture
+    # keeps serving "the last N days" whenever it is replayed.
+    def __init__(self, root):
+        self.root = root
+
+    @staticmethod
+    def _key(path, q):
+        if path.endswith('/market_chart/range'):
+            q = {k: v for k, v in q.items() if k not in ('from', 'to')}
+        raw = path + '?' + '&'.join(f'{k}={v}' for k, v in sorted(q.items()))
+        return hashlib.sha1(raw.encode()).hexdigest()
+
+    def get(self, path, q):
+        try:
+            with open(os.path.join(self.root, self._key(path, q) + '.json')) as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        body = entry['body']
+        if path.endswith('/market_chart/range'):
+            shift = float(q['to']) * 1000 - entry['params']['to'] * 1000
+            lo, hi = float(q['from']) * 1000, float(q['to']) * 1000
+            body = {k: [[t + shift, v] for t, v in series if lo <= t + shift <= hi]
+                    for k, series in body.items()}
+        return body
+
+    def put(self, path, q, body):
+        if path.endswith('/market_chart/range'):
+            # Keep the widest capture of each coin's range
+            old = self.get(path, {**q, 'from': 0})
+            if old and len(old.get('prices', [])) > len(body.get('prices', [])):
+                return
+        os.makedirs(self.root, exist_ok=True)
+        entry = {'path': path, 'params': {k: float(v) if k in ('from', 'to') else v for k, v in q.items()},
+                 'recorded_at': time.time(), 'body': body}
+        name = os.path.join(self.root, self._key(path, q) + '.json')
+        with open(name + '.tmp', 'w') as f:
+            json.dump(entry, f)
+        os.replace(name + '.tmp', name)
+
+
+class StandIn:
+    def __init__(self, coins=2000, latency=0.0, jitter=0.0, rate_limit=None, error_rate=0.0,
+                 retry_after=1, cassette=None, upstream=None, seed=0):
+        # rate_limit: requests/s served before answering 429 (None: unlimited);
+        # error_rate: share of other requests answered 429 anyway;
+        # upstream: record mode, cassette misses are fetched there and kept
+        self.coins = synthetic_market(coins) if isinstance(coins, int) else coins
+        self.latency, self.jitter = latency, jitter
+        self.rate_limit, self.error_rate, self.retry_after = rate_limit, error_rate, retry_after
+        self.cassette = Cassette(cassette) if cassette else None
+        self.upstream = upstream.rstrip('/') + '/' if upstream else None
+        self.calls = []
+        self.throttled = []
+        self.server = None
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._tokens, self._stamp = float(rate_limit or 0), time.monotonic()
+        self._session = requests.Session()
+        if os.environ.get('COINGECKO_API_KEY'):
+            self._session.headers['x-cg-demo-api-key'] = os.environ['COINGECKO_API_KEY']
+
+    def _throttle(self):
+        # True when this request should get a 429
+        with self._lock:
+            if self.error_rate and self._rng.random() < self.error_rate:
+                return True
+            if self.rate_limit is None:
+                return False
+            now = time.monotonic()
+            self._tokens = min(self.rate_limit, self._tokens + (now - self._stamp) * self.rate_limit)
+            self._stamp = now
+            if self._tokens < 1:
+                return True
+            self._tokens -= 1
+            return False
+
+    def respond(self, path, q):
+        """(status, body) for one request: cassette, then upstream (recording), then synthetic."""
+        if self._throttle():
+            self.throttled.append(path)
+            return 429, {'status': {'error_code': 429, 'error_message': 'rate limited (stand-in)'}}
+        self.calls.append(path)
+        if self.latency or self.jitter:
+            time.sleep(self.latency + self.jitter * self._rng.random())
+        if self.cassette is not None:
+            body = self.cassette.get(path, q)
+            if body is not None:
+                return 200, body
+        if self.upstream is not None:
+            resp = self._session.get(self.upstream + path, params=q, timeout=30)
+            if resp.ok:
+                self.cassette.put(path, q, resp.json())
+            return resp.status_code, resp.json()
+        data = self.handle(path, q)
+        return (404, data) if data is None else (200, data)
+
+    def handle(self, path, q):
+        if path == 'coins/markets':
+            page, per_page = int(q.get('page', 1)), int(q.get('per_page', 100))
+            rows = self.coins[(page - 1) * per_page:page * per_page]
+            if q.get('sparkline') != 'true':
+                rows = [{k: v for k, v in r.items() if k != 'sparkline_in_7d'} for r in rows]
+            return rows
+        if path == 'ping':
+            return {'gecko_says': '(V3) To the Moon!'}
+        if path == 'coins/list':
+            return [{k: c[k] for k in ('id', 'symbol', 'name')} for c in self.coins]
+        if path == 'simple/supported_vs_currencies':
+            return list(RATES)
+        if path == 'exchange_rates':
+            return {'rates': {k: {'value': v, 'type': 'crypto' if k == 'btc' else 'fiat'} for k, v in RATES.items()}}
+        if path == 'simple/price':
+            by_id = {c['id']: c for c in self.coins}
+            out = {}
+            for i in q['ids'].split(','):
+                if i not in by_id:
+                    continue
+                c = out[i] = {}
+                for cur in q['vs_currencies'].split(','):
+                    c[cur] = by_id[i]['current_price'] * RATES.get(cur, 60000.0) / 60000.0
+                    if q.get('include_24hr_change') == 'true':
+                        c[f'{cur}_24h_change'] = by_id[i]['price_change_percentage_24h']
+                if q.get('include_last_updated_at') == 'true':
+                    c['last_updated_at'] = int(time.time())
+            return out
+        if path.endswith('/market_chart/range'):
+            return _history(float(q['from']), float(q['to']))
+        if path.endswith('/market_chart'):
+            now = time.time()
+            return _history(now - float(q.get('days', 1)) * 86400, now)
+        return None
+
+    def start(self, port=0):
+        standin = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                path = url.path.strip('/').removeprefix('api/v3/')
+                status, data = standin.respond(path, {k: v[0] for k, v in parse_qs(url.query).items()})
+                body = json.dumps(data).encode()
+                self.send_response(status)
+                if status == 429:
+                    self.send_header('Retry-After', str(standin.retry_after))
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', port), Handler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    @property
+    def url(self):
+        return f'http://127.0.0.1:{self.server.server_port}/api/v3/'
+
+    def stop(self):
+        self.server.shutdown()
+
+    def report(self):
+        """Requests served and 429s injected, by endpoint."""
+        served = Counter(map(_endpoint, self.calls))
+        throttled = Counter(map(_endpoint, self.throttled))
+        return {ep: {'served': served[ep], '429': throttled[ep]} for ep in sorted(served | throttled)}
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('mode', choices=['serve', 'record'])
+    ap.add_argument('--cassette', help="directory of recorded responses")
+    ap.add_argument('--upstream', default='https://api.coingecko.com/api/v3/', help="record mode: real API")
+    ap.add_argument('--coins', type=int, default=2000, help="synthetic market size")
+    ap.add_argument('--port', type=int, default=8765)
+    ap.add_argument('--latency', type=float, default=0.0)
+    ap.add_argument('--jitter', type=float, default=0.0)
+    ap.add_argument('--rate-limit', type=float, help="requests/s before 429s")
+    ap.add_argument('--error-rate', type=float, default=0.0, help="share of requests answered 429")
+    args = ap.parse_args()
+    if args.mode == 'record' and not args.cassette:
+        ap.error('record needs --cassette')
+
+    standin = StandIn(args.coins, latency=args.latency, jitter=args.jitter, rate_limit=args.rate_limit,
+                      error_rate=args.error_rate, cassette=args.cassette,
+                      upstream=args.upstream if args.mode == 'record' else None).start(args.port)
+    print(f"COINGECKO_API_URL={standin.url}  ({args.mode}; Ctrl-C to stop)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        for ep, n in standin.report().items():
+            print(f"{ep:<40}{n['served']:>6} served{n['429']:>6} x 429")
+
+
+if __name__ == '__main__':
+    main()
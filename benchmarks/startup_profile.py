@@ -0,0 +1,74 @@
+# Cold-start and warm-rerun profile of the Streamlit apps, run headlessly
+# against the local stand-in API. Each app is profiled in a fresh interpreter
+# so the first run pays every import, as after a deploy.
+#   python benchmarks/startup_profile.py [--reruns 10] [--app tracker_app_final.py ...]
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APPS = ['tracker_app_final.py', 'tracker app.py']
+
+
+def profile_one(app, reruns):
+    sys.path.insert(0, ROOT)
+    from benchmarks.standin import StandIn
+    standin = StandIn(2000).start()
+    cache = tempfile.mkdtemp()
+    os.environ.update(COINGECKO_API_URL=standin.url, COINGECKO_RATE='1000', COINGECKO_BURST='1000',
+                      HISTORY_DIR=os.path.join(cache, 'history'), ASSET_DIR=os.path.join(cache, 'assets'))
+    from streamlit.testing.v1 import AppTest
+    modules = set(sys.modules)
+
+    at = AppTest.from_file(os.path.abspath(app), default_timeout=120)
+    t = time.perf_counter()
+    at.run()
+    cold = time.perf_counter() - t
+    warm = []
+    for _ in range(reruns):
+        t = time.perf_counter()
+        at.run()
+        warm.append(time.perf_counter() - t)
+    warm.sort()
+    return {
+        'app': os.path.basename(app),
+        'cold_ms': cold * 1000,
+        'warm_p50_ms': warm[len(warm) // 2] * 1000,
+        'warm_max_ms': warm[-1] * 1000,
+        'modules_loaded': len(set(sys.modules) - modules),
+        'plotly_loaded': 'plotly' in sys.modules,
+        'errors': [str(e.value) for e in at.exception],
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--reruns', type=int, default=10)
+    ap.add_argument('--app', action='append', help="app script (default: both apps)")
+    ap.add_argument('--child', help=argparse.SUPPRESS)
+    args = ap.parse_args()
+
+    if args.child:
+        print(json.dumps(profile_one(args.child, args.reruns)))
+        return
+    print(f"{'app':<24}{'cold':>10}{'warm p50':>10}{'warm max':>10}{'modules':>9}  plotly")
+    for app in args.app or [os.path.join(ROOT, a) for a in APPS]:
+        out = subprocess.run([sys.executable, __file__, '--child', app, '--reruns', str(args.reruns)],
+                             capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(app)))
+        lines = [l for l in out.stdout.splitlines() if l.startswith('{')]
+        if not lines:
+            print(f"{os.path.basename(app)}: failed\n{out.stderr[-2000:]}")
+            continue
+        r = json.loads(lines[-1])
+        print(f"{r['app']:<24}{r['cold_ms']:>8.0f}ms{r['warm_p50_ms']:>8.0f}ms{r['warm_max_ms']:>8.0f}ms"
+              f"{r['modules_loaded']:>9}  {'yes' if r['plotly_loaded'] else 'no'}")
+        for e in r['errors']:
+            print(f"  error: {e}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,48 @@
+# Loads a synthetic ~15k-coin market through UniverseLoader from a local
+# stand-in coins/markets server and reports latency and memory.
+#   python benchmarks/universe_bench.py [--coins 15000] [--latency 0.15] [--rate 0]
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from benchmarks.standin import StandIn  # noqa: E402
+from cg_client import CoinGeckoClient  # noqa: E402
+from market_universe import UniverseLoader  # noqa: E402
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--coins', type=int, default=15000)
+    ap.add_argument('--latency', type=float, default=0.15, help="server delay per page (s)")
+    ap.add_argument('--rate', type=float, default=0, help="client requests/s (0: unlimited)")
+    ap.add_argument('--concurrency', type=int, default=8)
+    args = ap.parse_args()
+
+    standin = StandIn(args.coins, latency=args.latency).start()
+    rate = args.rate or 1e9
+    client = CoinGeckoClient(base_url=standin.url, rate=rate, burst=max(1, int(min(rate, 64))))
+    loader = UniverseLoader(client, concurrency=args.concurrency, publish_every=0.5)
+
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    first = versions = None
+    for versions, df in enumerate(loader.stream('usd'), 1):
+        if first is None:
+            first = time.perf_counter() - t0, len(df)
+    total = time.perf_counter() - t0
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(f"{len(df):,} coins in {-(-args.coins // 250)} pages, {versions} published versions")
+    print(f"first page        {first[0] * 1000:8.0f} ms ({first[1]} rows)")
+    print(f"full market       {total * 1000:8.0f} ms")
+    print(f"frame memory      {df.memory_usage(deep=True).sum() / 2**20:8.1f} MiB")
+    print(f"peak allocations  {peak / 2**20:8.1f} MiB (incl. JSON decoding)")
+    standin.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+# ========================
+# OHLC CANDLE ENGINE
+# ========================
+# Resamples one stored (ts, price) series into candles at several resolutions.
+# Buckets are found with one integer division and each candle's open/high/
+# low/close with `reduceat`, so a year of 5-minute points resamples in a few
+# milliseconds. Results are kept per (coin, currency, history tier,
+# resolution) and points appended to the series, or a revised last point,
+# only redo the last candle onward.
+
+HOUR = 3600 * 1000
+DAY = 24 * HOUR
+# Resolution -> (bucket width, bucket origin) in epoch milliseconds. Weeks
+# start on Monday (the epoch was a Thursday).
+RESOLUTIONS = {
+    '1h': (HOUR, 0),
+    '4h': (4 * HOUR, 0),
+    '1d': (DAY, 0),
+    '1w': (7 * DAY, 4 * DAY),
+}
+FIELDS = ('ts', 'open', 'high', 'low', 'close')
+# `auto_resolution` picks the coarsest resolution with at least this many candles
+MIN_CANDLES = 24
+
+
+def ohlc(ts, prices, width, origin=0):
+    """Candles of `width` ms for ascending `ts` (ms) as a dict of FIELDS arrays."""
+    ts = np.asarray(ts, dtype=np.int64)
+    x = np.asarray(prices, dtype=np.float64)
+    if not len(x):
+        return {f: np.empty(0, dtype=np.int64 if f == 'ts' else np.float64) for f in FIELDS}
+    bucket = (ts - origin) // width
+    starts = np.concatenate([[0], np.flatnonzero(np.diff(bucket)) + 1])
+    ends = np.append(starts[1:], len(x)) - 1
+    return {
+        'ts': bucket[starts] * width + origin,
+        'open': x[starts],
+        'high': np.maximum.reduceat(x, starts),
+        'low': np.minimum.reduceat(x, starts),
+        'close': x[ends],
+    }
+
+
+def auto_resolution(days):
+    for res in ('1w', '1d', '4h'):
+        if days * DAY / RESOLUTIONS[res][0] >= MIN_CANDLES:
+            return res
+    return '1h'
+
+
+class _Entry:
+    __slots__ = ('ts0', 'ts_settled', 'settled', 'ts_last', 'last', 'n', 'm', 'last_start', 'buffers')
+
+
+class CandleEngine:
+    def __init__(self, max_entries=1024):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _store(self, e, at, ts, x, candles, first_point):
+        # Write `candles` over the buffers from candle `at`, growing them 2x
+        m = at + len(candles['ts'])
+        for f, y in candles.items():
+            buf = e.buffers.get(f)
+            if buf is None or len(buf) < m:
+                grown = np.empty(2 * m, dtype=y.dtype)
+                if buf is not None:
+                    grown[:at] = buf[:at]
+                buf = e.buffers[f] = grown
+            buf[at:m] = y
+        # Point index where the (still open) last candle starts
+        e.last_start = first_point + int(np.searchsorted(ts[first_point:], candles['ts'][-1]))
+        e.ts0, e.n, e.m = ts[0], len(ts), m
+        # The last point is the live one and may be revised; everything up
+        # to the one before it must be unchanged for the cache to apply
+        e.ts_settled, e.settled = (ts[-2], x[-2]) if len(ts) > 1 else (None, None)
+        e.ts_last, e.last = ts[-1], x[-1]
+
+    def candles(self, coin, cur, ts, prices, resolution, tier=None):
+        """Candles for a growing (ts, price) series from history `tier`; only the tail is recomputed."""
+        ts = np.asarray(ts, dtype=np.int64)
+        x = np.asarray(prices, dtype=np.float64)
+        width, origin = RESOLUTIONS[resolution]
+        if not len(x):
+            return ohlc(ts, x, width, origin)
+        key = (coin, cur, tier, resolution)
+        with self._lock:
+            e = self._entries.get(key)
+            if e is not None and len(x) >= e.n and ts[0] == e.ts0 and \
+                    (e.n < 2 or ts[e.n - 2] == e.ts_settled and
+                     np.array_equal(x[e.n - 2], e.settled, equal_nan=True)):
+                if len(x) > e.n or ts[e.n - 1] != e.ts_last or \
+                        not np.array_equal(x[e.n - 1], e.last, equal_nan=True):
+                    s = e.last_start
+                    self._store(e, e.m - 1, ts, x, ohlc(ts[s:], x[s:], width, origin), s)
+                self._entries.move_to_end(key)
+            else:
+                e = self._entries[key] = _Entry()
+                e.buffers = {}
+                self._store(e, 0, ts, x, ohlc(ts, x, width, origin), 0)
+            out = {}
+            for f, buf in e.buffers.items():
+                view = buf[:e.m].view()
+                view.flags.writeable = False
+                out[f] = view
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return out
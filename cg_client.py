@@ -0,0 +1,169 @@
+import asyncio
+import os
+import random
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import telemetry
+
+# ========================
+# COINGECKO CLIENT
+# ========================
+# Drop-in for the pycoingecko methods the apps use, on top of one pooled
+# keep-alive session. Every request takes a token from a shared bucket,
+# retries 429/5xx with jittered exponential backoff, and identical requests
+# already in flight share a single response. Retry-After is honoured up to
+# `max_backoff`; a longer one fails the call at once rather than hold every
+# caller coalesced onto it, and the caller retries on its own schedule.
+
+API_URL = os.environ.get('COINGECKO_API_URL', 'https://api.coingecko.com/api/v3/')
+API_KEY = os.environ.get('COINGECKO_API_KEY')
+# Public API budget is roughly 30 calls/minute
+RATE = float(os.environ.get('COINGECKO_RATE', 0.5))
+BURST = int(os.environ.get('COINGECKO_BURST', 10))
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    def __init__(self, rate, burst):
+        self.rate, self.burst = rate, burst
+        self._tokens = float(burst)
+        self._stamp = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._stamp) * self.rate)
+                self._stamp = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+def _param(v):
+    # Same encoding pycoingecko uses for list/bool query parameters
+    if isinstance(v, bool):
+        return str(v).lower()
+    if isinstance(v, (list, tuple)):
+        return ','.join(map(str, v))
+    return v
+
+
+class CoinGeckoClient:
+    def __init__(self, base_url=API_URL, api_key=API_KEY, rate=RATE, burst=BURST,
+                 pool_size=16, retries=5, backoff=1.0, max_backoff=60.0, timeout=15):
+        self.base_url = base_url.rstrip('/') + '/'
+        self.retries, self.backoff, self.max_backoff, self.timeout = retries, backoff, max_backoff, timeout
+        self.bucket = TokenBucket(rate, burst)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        if api_key:
+            self.session.headers['x-cg-demo-api-key'] = api_key
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=pool_size, thread_name_prefix='coingecko')
+        self.aio = AsyncCoinGecko(self)
+
+    def _delay(self, attempt, resp=None):
+        retry_after = resp.headers.get('Retry-After') if resp is not None else None
+        if retry_after and retry_after.isdigit():
+            return float(retry_after)
+        return min(self.max_backoff, self.backoff * 2 ** attempt) * random.uniform(0.5, 1.5)
+
+    def _request(self, path, params):
+        for attempt in range(self.retries + 1):
+            self.bucket.acquire()
+            t = time.perf_counter()
+            try:
+                resp = self.session.get(self.base_url + path, params=params, timeout=self.timeout)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                telemetry.upstream(path, type(e).__name__, time.perf_counter() - t)
+                if attempt == self.retries:
+                    raise
+                time.sleep(self._delay(attempt))
+                continue
+            telemetry.upstream(path, resp.status_code, time.perf_counter() - t)
+            if resp.status_code in RETRY_STATUS and attempt < self.retries:
+                delay = self._delay(attempt, resp)
+                if delay <= self.max_backoff:
+                    time.sleep(delay)
+                    continue
+            resp.raise_for_status()
+            return resp.json()
+
+    def get(self, path, **params):
+        """GET `path` with single-flight coalescing of identical concurrent calls."""
+        params = {k: _param(v) for k, v in params.items() if v is not None}
+        key = (path, tuple(sorted(params.items())))
+        with self._lock:
+            fut = self._inflight.get(key)
+            leader = fut is None
+            if leader:
+                fut = self._inflight[key] = Future()
+        if not leader:
+            telemetry.inc('upstream_coalesced_total', (telemetry.endpoint(path),))
+            return fut.result()
+        try:
+            fut.set_result(self._request(path, params))
+        except BaseException as e:
+            fut.set_exception(e)
+        finally:
+            with self._lock:
+                del self._inflight[key]
+        return fut.result()
+
+    # pycoingecko-compatible endpoints
+    def ping(self):
+        return self.get('ping')
+
+    def get_supported_vs_currencies(self):
+        return self.get('simple/supported_vs_currencies')
+
+    def get_price(self, ids, vs_currencies, **kwargs):
+        return self.get('simple/price', ids=ids, vs_currencies=vs_currencies, **kwargs)
+
+    def get_coins_list(self, **kwargs):
+        return self.get('coins/list', **kwargs)
+
+    def get_coins_markets(self, vs_currency, **kwargs):
+        return self.get('coins/markets', vs_currency=vs_currency, **kwargs)
+
+    def get_coin_market_chart_by_id(self, id, vs_currency, days, **kwargs):
+        return self.get(f'coins/{id}/market_chart', vs_currency=vs_currency, days=days, **kwargs)
+
+    def get_coin_market_chart_range_by_id(self, id, vs_currency, from_timestamp, to_timestamp, **kwargs):
+        return self.get(f'coins/{id}/market_chart/range', vs_currency=vs_currency,
+                        **{'from': from_timestamp, 'to': to_timestamp}, **kwargs)
+
+    def get_exchange_rates(self):
+        return self.get('exchange_rates')
+
+
+class AsyncCoinGecko:
+    # `await client.aio.get_coin_market_chart_by_id(...)`: every endpoint of the
+    # sync client, run on its thread pool so many requests overlap
+    def __init__(self, client):
+        self._client = client
+
+    def __getattr__(self, name):
+        method = getattr(self._client, name)
+
+        async def call(*args, **kwargs):
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._client._executor, lambda: method(*args, **kwargs))
+        return call
+
+    async def gather(self, calls):
+        """Run [(method_name, args, kwargs), ...] concurrently; failures come back as exceptions."""
+        return await asyncio.gather(*(getattr(self, m)(*a, **kw) for m, a, kw in calls),
+                                    return_exceptions=True)
@@ -0,0 +1,67 @@
+import numpy as np
+
+# ========================
+# CHART DOWNSAMPLING
+# ========================
+# A chart can't show more points than it has pixels, so long windows are cut
+# down to about the plot width before they reach Plotly. LTTB keeps the
+# points that carry the shape of the line (peaks, troughs, turns); min/max
+# bucketing is the cheaper fallback that keeps every bucket's extremes.
+
+# Points kept per trace, about two per pixel of a wide plot
+CHART_POINTS = 1500
+# Above this many points per trace, draw with WebGL (Scattergl) instead of SVG
+WEBGL_THRESHOLD = 2000
+
+
+def _edges(length, buckets):
+    # Bucket boundaries over the interior points (first and last are kept)
+    return np.linspace(1, length - 1, buckets + 1).astype(np.int64)
+
+
+def lttb(x, y, n=CHART_POINTS):
+    """Indices of the `n` points Largest-Triangle-Three-Buckets keeps."""
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    length = len(y)
+    if n >= length or n < 3:
+        return np.arange(length)
+    edges = _edges(length, n - 2)
+    # Mean of every bucket, used as the third vertex of the previous bucket's
+    # triangles; the last bucket looks ahead to the final point
+    counts = np.diff(edges)
+    mean_x = np.add.reduceat(x[1:length - 1], edges[:-1] - 1) / counts
+    mean_y = np.add.reduceat(y[1:length - 1], edges[:-1] - 1) / counts
+    mean_x = np.append(mean_x[1:], x[-1])
+    mean_y = np.append(mean_y[1:], y[-1])
+
+    out = np.empty(n, dtype=np.int64)
+    out[0], out[-1] = 0, length - 1
+    a = 0
+    for i in range(n - 2):
+        lo, hi = edges[i], edges[i + 1]
+        area = np.abs((x[a] - mean_x[i]) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (mean_y[i] - y[a]))
+        a = lo + int(np.argmax(area))
+        out[i + 1] = a
+    return out
+
+
+def minmax(y, n=CHART_POINTS):
+    """Indices of each bucket's minimum and maximum, about `n` in total."""
+    y = np.asarray(y, dtype=np.float64)
+    length = len(y)
+    buckets = (n - 2) // 2
+    if n >= length or buckets < 1:
+        return np.arange(length)
+    edges = _edges(length, buckets)
+    # Equal-width buckets padded to a rectangle, so one argmin/argmax covers all
+    width = int(np.diff(edges).max())
+    pos = edges[:-1, None] + np.arange(width)
+    valid = pos < edges[1:, None]
+    pos = np.minimum(pos, length - 1)
+    vals = y[pos]
+    lo = np.where(valid, vals, np.inf).argmin(axis=1)
+    hi = np.where(valid, vals, -np.inf).argmax(axis=1)
+    rows = np.arange(buckets)
+    picked = np.concatenate([[0], pos[rows, lo], pos[rows, hi], [length - 1]])
+    return np.unique(picked)
@@ -0,0 +1,67 @@
+import pandas as pd
+
+# ========================
+# CURRENCY CONVERSION
+# ========================
+# CoinGecko's exchange_rates endpoint quotes every currency against BTC, so one
+# small vector converts a base-currency snapshot into any other currency with
+# a single multiply per money column. Percent changes move with the currency
+# too: a coin's change in `cur` is its change in the base times the base's own
+# change against `cur`. The rates are BTC prices, so that factor is bitcoin's
+# change in `cur` (fetch_moves, one small call) over its change in the base
+# (its row in the snapshot). Until those moves are known the money columns
+# are converted anyway and the percent columns are left unknown (NaN).
+
+BASE_CURRENCY = 'usd'
+MONEY_COLUMNS = ['current_price', 'market_cap', 'total_volume', 'fully_diluted_valuation',
+                 'high_24h', 'low_24h', 'price_change_24h', 'market_cap_change_24h',
+                 'ath', 'atl']
+HORIZONS = ['1h', '24h', '7d', '30d']
+# Percent column -> horizon of the change it describes
+PCT_COLUMNS = {**{f'price_change_percentage_{h}_in_currency': h for h in HORIZONS},
+               'price_change_percentage_24h': '24h', 'market_cap_change_percentage_24h': '24h'}
+
+
+def fetch_rates(cg) -> pd.DataFrame:
+    rates = cg.get_exchange_rates()['rates']
+    return pd.DataFrame({
+        'value': [float(r['value']) for r in rates.values()],
+        'type': [r.get('type') for r in rates.values()],
+    }, index=pd.Index(list(rates), name='currency'))
+
+
+def fetch_moves(cg, cur) -> pd.DataFrame:
+    # Bitcoin's percent change in `cur` over each horizon
+    row = cg.get_coins_markets(vs_currency=cur, ids='bitcoin', price_change_percentage=','.join(HORIZONS))[0]
+    return pd.DataFrame({'change': [row.get(f'price_change_percentage_{h}_in_currency') for h in HORIZONS]},
+                        index=pd.Index(HORIZONS, name='horizon'), dtype='float64')
+
+
+def factor(rates, base, cur):
+    # Units of `cur` per unit of `base`; None when either is not quoted
+    values = rates['value']
+    if base not in values.index or cur not in values.index or not values[base]:
+        return None
+    return float(values[cur] / values[base])
+
+
+def convert(df, rates, base, cur, moves=None):
+    """Re-denominate a `base` snapshot in `cur`; None if `cur` or `base` is not quoted."""
+    if cur == base:
+        return df
+    f = factor(rates, base, cur)
+    if f is None:
+        return None
+    out = {c: pd.to_numeric(df[c], errors='coerce') * f for c in MONEY_COLUMNS if c in df.columns}
+    pct = [c for c in PCT_COLUMNS if c in df.columns]
+    if pct:
+        btc = df[df['id'] == 'bitcoin'] if 'id' in df.columns else df.iloc[:0]
+        if moves is None or moves.empty or btc.empty:
+            return df.assign(**out, **{c: df[c] * float('nan') for c in pct})
+        for c in pct:
+            h = PCT_COLUMNS[c]
+            base_move = btc[f'price_change_percentage_{h}_in_currency'].iloc[0] \
+                if f'price_change_percentage_{h}_in_currency' in btc.columns else float('nan')
+            ratio = (1 + moves.at[h, 'change'] / 100) / (1 + float(base_move) / 100)
+            out[c] = (((1 + df[c] / 100) * ratio - 1) * 100).astype(df[c].dtype)
+    return df.assign(**out)
@@ -0,0 +1,183 @@
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+import numpy as np
+import pandas as pd
+
+import atomic_file
+
+# ========================
+# LOCAL PRICE-HISTORY STORE
+# ========================
+# Keeps memory-mapped .npy files of (timestamp, price) points per coin and
+# currency. Upstream picks the spacing from the span of a range request
+# (5-minutely up to a day, hourly up to 90 days, daily beyond), so each spacing
+# is its own series and a window is served from the finest one that covers it;
+# no array ever mixes spacings. A longer window refetches its series in one
+# request, and the live tail is merged in at most once per `tail_refresh`
+# seconds. Any window inside a series' span is a local slice. The files are
+# shared by every process on the host (the apps and the API workers), so a
+# series is read, merged and written under an exclusive file lock.
+
+HISTORY_DIR = os.environ.get(
+    'HISTORY_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'history'))
+TAIL_REFRESH = 60
+# Requested starts this close to the stored start are treated as covered
+START_SLACK = 3600
+# Bounded series are trimmed only once they hold this fraction of their
+# longest window too much, so their first point (which the indicator and
+# candle caches check) stays put between trims
+TRIM_STEP = 0.25
+POINT = np.dtype([('ts', '<i8'), ('price', '<f8')])
+# Series name -> (longest window it serves in days, None for unbounded;
+# point spacing in s; shortest request span upstream answers at that spacing)
+TIERS = {
+    '5m': (1, 300, 0),
+    '1h': (90, 3600, 2 * 86400),
+    '1d': (None, 86400, 91 * 86400),
+}
+
+
+def tier(days):
+    """Name of the series a `days`-long window is served from."""
+    for name, (longest, _, _) in TIERS.items():
+        if longest is None or days <= longest:
+            return name
+
+
+def _merge(old, new, step):
+    # One point per `step` bucket, the latest in each; on equal timestamps
+    # the freshly fetched point wins
+    points = np.concatenate([old, new])
+    order = np.lexsort((np.repeat([0, 1], [len(old), len(new)]), points['ts']))
+    points = points[order]
+    bucket = points['ts'] // (step * 1000)
+    return points[np.append(bucket[1:] != bucket[:-1], True)] if len(points) else points
+
+
+class HistoryStore:
+    def __init__(self, cg, root=HISTORY_DIR, tail_refresh=TAIL_REFRESH):
+        self.cg = cg
+        self.root = root
+        self.tail_refresh = tail_refresh
+        self._locks = defaultdict(threading.Lock)
+
+    def _paths(self, coin, cur, name):
+        d = os.path.join(self.root, cur, coin, name)
+        return os.path.join(d, 'prices.npy'), os.path.join(d, 'meta.json')
+
+    def _load(self, coin, cur, name):
+        data_path, meta_path = self._paths(coin, cur, name)
+        try:
+            with open(meta_path) as f:
+                meta = json.load(f)
+            return np.load(data_path, mmap_mode='r'), meta
+        except (OSError, ValueError):
+            return None, None
+
+    @contextmanager
+    def _locked(self, coin, cur, name):
+        # Threads of this process, then other processes
+        with self._locks[(coin, cur, name)]:
+            if fcntl is None:
+                yield
+                return
+            folder = os.path.dirname(self._paths(coin, cur, name)[0])
+            os.makedirs(folder, exist_ok=True)
+            with open(os.path.join(folder, '.lock'), 'w') as f:
+                fcntl.flock(f, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _save(self, coin, cur, name, points, meta):
+        data_path, meta_path = self._paths(coin, cur, name)
+        os.makedirs(os.path.dirname(data_path), exist_ok=True)
+        atomic_file.replace(data_path, lambda f: np.save(f, points), 'wb')
+        atomic_file.replace(meta_path, lambda f: json.dump(meta, f), 'w')
+
+    def _fetch(self, coin, cur, name, start, end):
+        # [start, end] at the series' spacing: short spans are widened to what
+        # upstream answers at that spacing (the extra points are cut off again)
+        # and long ones capped, as upstream would answer them coarser
+        longest, step, shortest = TIERS[name]
+        if longest is not None:
+            start = max(start, end - longest * 86400)
+        data = self.cg.get_coin_market_chart_range_by_id(
+            coin, vs_currency=cur, from_timestamp=int(min(start, end - shortest)), to_timestamp=int(end))
+        prices = [p for p in data.get('prices', []) if p[1] is not None]
+        out = np.empty(len(prices), dtype=POINT)
+        if prices:
+            arr = np.asarray(prices, dtype=np.float64)
+            out['ts'], out['price'] = arr[:, 0].astype(np.int64), arr[:, 1]
+        out = out[out['ts'] >= int(start * 1000)]
+        return _merge(out[:0], out, step)
+
+    def stored(self, coin, cur, days):
+        # Everything on disk in the series a `days` window uses, without
+        # touching the network
+        points, _ = self._load(coin, cur, tier(days))
+        return points if points is not None else np.empty(0, dtype=POINT)
+
+    def _extend(self, name, coin, cur, points, meta, start, now):
+        if start < meta['start'] - START_SLACK:
+            # Refetched as one range up to now: 5-minutely points only come
+            # back for ranges that end now, and the tail is brought up to date
+            fresh, meta['start'] = self._fetch(coin, cur, name, start, now), start
+        elif now - meta['checked'] > self.tail_refresh:
+            last = int(points['ts'][-1]) // 1000 if len(points) else meta['start']
+            fresh = self._fetch(coin, cur, name, last, now)
+        else:
+            return points, False
+        meta['checked'] = now
+        return _merge(points, fresh, TIERS[name][1]), True
+
+    def refresh(self, coin, cur, days):
+        # Make sure the last `days` days are stored; returns the (possibly
+        # mapped) points of the series that serves them
+        now = time.time()
+        start, name = now - days * 86400, tier(days)
+        longest = TIERS[name][0]
+        with self._locked(coin, cur, name):
+            points, meta = self._load(coin, cur, name)
+            if points is None:
+                points = self._fetch(coin, cur, name, start, now)
+                meta = {'start': start, 'checked': now}
+            else:
+                try:
+                    points, changed = self._extend(name, coin, cur, points, meta, start, now)
+                except Exception:
+                    # Upstream trouble: serve what is stored rather than nothing
+                    if not len(points):
+                        raise
+                    return points
+                if not changed:
+                    return points
+            if longest is not None:
+                # Bounded series only keep what their longest window needs
+                cutoff = now - longest * 86400 - START_SLACK
+                if len(points) and points['ts'][0] < (cutoff - TRIM_STEP * longest * 86400) * 1000:
+                    points = points[np.searchsorted(points['ts'], int(cutoff * 1000)):]
+                    meta['start'] = max(meta['start'], cutoff)
+            self._save(coin, cur, name, points, meta)
+            return points
+
+    def window(self, coin, cur, days) -> pd.DataFrame:
+        """Price history for the last `days` days, indexed by timestamp."""
+        start = time.time() - days * 86400
+        points = self.refresh(coin, cur, days)
+        sl = points[np.searchsorted(points['ts'], int(start * 1000)):]
+        df = pd.DataFrame({'price': np.array(sl['price'])},
+                          index=pd.to_datetime(np.array(sl['ts']), unit='ms'))
+        df.index.name = 'timestamp'
+        return df
@@ -0,0 +1,209 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+# ========================
+# TECHNICAL INDICATORS
+# ========================
+# NumPy re-implementations of the `ta` indicators the chart draws. Every kernel
+# works along the last axis, so a (coins, points) matrix is handled in one
+# pass, and takes/returns a small state so appended points cost O(new points).
+# Semantics (warm-up NaNs, adjust=False EMAs, ddof=0 bands) follow `ta`.
+
+# Chart column -> (kind, params)
+INDICATORS = {
+    'SMA_20': ('sma', (20,)),
+    'SMA_50': ('sma', (50,)),
+    'RSI': ('rsi', (14,)),
+    'MACD': ('macd', (12, 26)),
+    'Bollinger': ('bollinger', (20, 2)),
+}
+
+
+def _ema(x, alpha, prev=None):
+    # y[t] = alpha*x[t] + (1-alpha)*y[t-1], y[0] = x[0] unless `prev` is given.
+    # Closed form per block; blocks are short enough that beta**-k stays finite.
+    beta = 1.0 - alpha
+    y = np.empty_like(x)
+    if x.shape[-1] == 0:
+        return y
+    if prev is None:
+        y[..., 0] = prev = x[..., 0]
+        s = 1
+    else:
+        s = 0
+    block = max(1, int(30 / -np.log(beta))) if 0 < beta < 1 else 1
+    for i in range(s, x.shape[-1], block):
+        xb = x[..., i:i + block]
+        k = np.arange(1, xb.shape[-1] + 1)
+        y[..., i:i + xb.shape[-1]] = beta ** k * (
+            np.expand_dims(prev, -1) + alpha * np.cumsum(xb * beta ** -k, axis=-1))
+        prev = y[..., i + xb.shape[-1] - 1]
+    return y
+
+
+def _mask(y, count, first_valid):
+    # NaN out outputs whose absolute position is still inside the warm-up
+    pos = count + np.arange(y.shape[-1])
+    y[..., pos < first_valid] = np.nan
+    return y
+
+
+def _rolling(x, n):
+    # (..., T) -> (..., T-n+1, n) windows without copying
+    return np.lib.stride_tricks.sliding_window_view(x, n, axis=-1)
+
+
+def _pad(y, total):
+    out = np.full(y.shape[:-1] + (total,), np.nan)
+    out[..., total - y.shape[-1]:] = y
+    return out
+
+
+def sma(x, n, state=None):
+    tail = state['tail'] if state else x[..., :0]
+    full = np.concatenate([tail, x], axis=-1)
+    if full.shape[-1] >= n:
+        # Shift by the first value so the running sum stays well conditioned
+        base = full[..., :1]
+        c = np.cumsum(full - base, axis=-1)
+        c = np.concatenate([np.zeros_like(base), c], axis=-1)
+        y = _pad((c[..., n:] - c[..., :-n]) / n + base, full.shape[-1])
+    else:
+        y = np.full(full.shape, np.nan)
+    return {'': y[..., tail.shape[-1]:]}, {'tail': full[..., max(0, full.shape[-1] - n + 1):]}
+
+
+def bollinger(x, n=20, k=2, state=None):
+    tail = state['tail'] if state else x[..., :0]
+    full = np.concatenate([tail, x], axis=-1)
+    if full.shape[-1] >= n:
+        w = _rolling(full, n)
+        mavg, mstd = _pad(w.mean(axis=-1), full.shape[-1]), _pad(w.std(axis=-1), full.shape[-1])
+    else:
+        mavg = mstd = np.full(full.shape, np.nan)
+    cut = tail.shape[-1]
+    return ({'_High': (mavg + k * mstd)[..., cut:], '_Low': (mavg - k * mstd)[..., cut:]},
+            {'tail': full[..., max(0, full.shape[-1] - n + 1):]})
+
+
+def rsi(x, n=14, state=None):
+    count = state['count'] if state else 0
+    if state:
+        diff = np.diff(np.concatenate([state['last'], x], axis=-1), axis=-1)
+    else:
+        diff = np.diff(x, axis=-1, prepend=x[..., :1])
+    up = _ema(np.where(diff > 0, diff, 0.0), 1 / n, state and state['up'])
+    dn = _ema(np.where(diff < 0, -diff, 0.0), 1 / n, state and state['dn'])
+    with np.errstate(divide='ignore', invalid='ignore'):
+        y = np.where(dn == 0, 100.0, 100 - 100 / (1 + up / dn))
+    new = {'last': x[..., -1:].copy(), 'up': up[..., -1], 'dn': dn[..., -1], 'count': count + x.shape[-1]}
+    return {'': _mask(y, count, n - 1)}, new if x.shape[-1] else state
+
+
+def macd(x, fast=12, slow=26, state=None):
+    count = state['count'] if state else 0
+    ef = _ema(x, 2 / (fast + 1), state and state['fast'])
+    es = _ema(x, 2 / (slow + 1), state and state['slow'])
+    new = {'fast': ef[..., -1], 'slow': es[..., -1], 'count': count + x.shape[-1]}
+    return {'': _mask(ef - es, count, slow - 1)}, new if x.shape[-1] else state
+
+
+KERNELS = {'sma': sma, 'rsi': rsi, 'macd': macd, 'bollinger': bollinger}
+
+
+def columns(names):
+    return [n + s for n in names for s in (('_High', '_Low') if INDICATORS[n][0] == 'bollinger' else ('',))]
+
+
+def compute(prices, names=tuple(INDICATORS)):
+    """Cold vectorized pass over a 1-D series or a (coins, points) matrix."""
+    x = np.asarray(prices, dtype=np.float64)
+    out = {}
+    for name in names:
+        kind, params = INDICATORS[name]
+        for suffix, y in KERNELS[kind](x, *params)[0].items():
+            out[name + suffix] = y
+    return out
+
+
+# ========================
+# SHARED INCREMENTAL ENGINE
+# ========================
+# The newest point of a stored series is the live one and may still be
+# revised (same bucket, new price or timestamp), so an entry's kernel state
+# stops one point short of its end and every call recomputes from that point.
+class _Entry:
+    __slots__ = ('ts0', 'ts_settled', 'settled', 'ts_last', 'last', 'n', 'shape', 'buffers', 'state')
+
+
+class IndicatorEngine:
+    def __init__(self, max_entries=4096):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _cold(self, kind, params, ts, x):
+        e = _Entry()
+        e.ts0, e.n, e.shape, e.buffers, e.state = ts[0], 0, x.shape[:-1], {}, None
+        self._extend(e, kind, params, ts, x)
+        return e
+
+    def _extend(self, e, kind, params, ts, x):
+        # Advance the settled state to the point before the last one, then
+        # run the last point on top of it
+        n, m = x.shape[-1], max(e.n - 1, 0)
+        head = {}
+        if n - 1 > m:
+            head, e.state = KERNELS[kind](x[..., m:n - 1], *params, state=e.state)
+        tail, _ = KERNELS[kind](x[..., n - 1:], *params, state=e.state)
+        for s, y in tail.items():
+            if s in head:
+                y = np.concatenate([head[s], y], axis=-1)
+            buf = e.buffers.get(s)
+            if buf is None or buf.shape[-1] < n:
+                grown = np.empty(y.shape[:-1] + (2 * n,))
+                if buf is not None:
+                    grown[..., :m] = buf[..., :m]
+                buf = e.buffers[s] = grown
+            buf[..., m:n] = y
+        e.n = n
+        e.ts_settled, e.settled = (ts[n - 2], x[..., n - 2].copy()) if n > 1 else (None, None)
+        e.ts_last, e.last = ts[n - 1], x[..., n - 1].copy()
+
+    def compute(self, key, cur, ts, prices, names=tuple(INDICATORS), tier=None):
+        """Indicator columns for a growing series; only new points are computed.
+
+        `prices` is one coin's series or a (coins, points) matrix on the shared
+        timestamps `ts`; a matrix is kept and extended as one entry under `key`,
+        so appending a point to every coin is one kernel call per indicator.
+        `tier` names the history series `ts` comes from, so series of different
+        spacing are cached side by side.
+        """
+        ts = np.asarray(ts)
+        x = np.asarray(prices, dtype=np.float64)
+        out = {}
+        if not x.shape[-1]:
+            return {c: np.empty(x.shape) for c in columns(names)}
+        with self._lock:
+            for name in names:
+                kind, params = INDICATORS[name]
+                k = (key, cur, tier, kind, params)
+                e = self._entries.get(k)
+                if e is not None and x.shape[-1] >= e.n and x.shape[:-1] == e.shape and ts[0] == e.ts0 and \
+                        (e.n < 2 or ts[e.n - 2] == e.ts_settled and
+                         np.array_equal(x[..., e.n - 2], e.settled, equal_nan=True)):
+                    if x.shape[-1] > e.n or ts[e.n - 1] != e.ts_last or \
+                            not np.array_equal(x[..., e.n - 1], e.last, equal_nan=True):
+                        self._extend(e, kind, params, ts, x)
+                    self._entries.move_to_end(k)
+                else:
+                    e = self._entries[k] = self._cold(kind, params, ts, x)
+                for s, buf in e.buffers.items():
+                    view = buf[..., :e.n].view()
+                    view.flags.writeable = False
+                    out[name + s] = view
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return out
@@ -0,0 +1,106 @@
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+# ========================
+# CROSS-MARKET ANALYTICS
+# ========================
+# Everything here comes from the `sparkline_in_7d` column the market fetch
+# already returns: the series are stacked into one (coins, points) matrix and
+# correlation, rolling volatility and beta are a handful of matrix products
+# over its log returns. Gaps (coins listed mid-week, missing points) are
+# masked, so each pair uses the points both coins have.
+
+SPAN_DAYS = 7
+# Rolling volatility window, in sparkline points (hourly, so one day)
+WINDOW = 24
+# Pairs with fewer common returns than this get NaN
+MIN_OVERLAP = 12
+REFERENCE = 'bitcoin'
+
+
+def _series(x):
+    if isinstance(x, dict):
+        x = x.get('price')
+    return x if isinstance(x, (list, tuple, np.ndarray)) else ()
+
+
+def price_matrix(column) -> np.ndarray:
+    """(coins, points) prices, right-aligned on the latest point, NaN-padded."""
+    series = [_series(x) for x in column]
+    length = max((len(s) for s in series), default=0)
+    out = np.full((len(series), length), np.nan)
+    for i, s in enumerate(series):
+        if len(s):
+            try:
+                out[i, length - len(s):] = s
+            except (TypeError, ValueError):
+                out[i, length - len(s):] = [v if isinstance(v, (int, float)) else np.nan for v in s]
+    out[~(out > 0)] = np.nan
+    return out
+
+
+def log_returns(prices):
+    return np.diff(np.log(prices), axis=-1)
+
+
+def _pairwise(r):
+    # Sums over the points where both rows are finite, as matrix products
+    m = np.isfinite(r).astype(np.float64)
+    x = np.where(m > 0, r, 0.0)
+    n = m @ m.T
+    sx = x @ m.T  # [i, j]: sum of x_i where j is also present
+    sxx = (x * x) @ m.T
+    sxy = x @ x.T
+    with np.errstate(invalid='ignore', divide='ignore'):
+        cov = (sxy - sx * sx.T / n) / (n - 1)
+        var_i = (sxx - sx ** 2 / n) / (n - 1)
+    few = n < MIN_OVERLAP
+    cov[few] = var_i[few] = np.nan
+    return cov, var_i, var_i.T
+
+
+def rolling_volatility(r, window=WINDOW):
+    """Std of each row over every `window` consecutive returns (ddof=1)."""
+    m = np.isfinite(r)
+    x = np.where(m, r, 0.0)
+    pad = np.zeros((r.shape[0], 1))
+    cs = np.concatenate([pad, np.cumsum(x, axis=1)], axis=1)
+    css = np.concatenate([pad, np.cumsum(x * x, axis=1)], axis=1)
+    cn = np.concatenate([pad, np.cumsum(m, axis=1)], axis=1)
+    s, ss, n = (a[:, window:] - a[:, :-window] for a in (cs, css, cn))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        out = np.sqrt(np.maximum(ss - s * s / n, 0) / (n - 1))
+    out[n < window // 2] = np.nan
+    return out
+
+
+class Analytics(NamedTuple):
+    ids: np.ndarray
+    corr: np.ndarray          # (coins, coins) return correlation
+    rolling_vol: np.ndarray   # (coins, windows) annualized rolling volatility
+    summary: pd.DataFrame     # per-coin volatility, beta and correlation to REFERENCE
+
+
+def analyze(df: pd.DataFrame, reference=REFERENCE, window=WINDOW, column='sparkline_in_7d') -> Analytics:
+    prices = price_matrix(df[column])
+    r = log_returns(prices)
+    annualize = np.sqrt(365 * r.shape[1] / SPAN_DAYS)
+    cov, var_i, var_j = _pairwise(r)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        corr = cov / np.sqrt(var_i * var_j)
+    vol = rolling_volatility(r, window) * annualize
+
+    ids = df['id'].to_numpy()
+    summary = pd.DataFrame({
+        'Volatility 7d %': np.sqrt(np.diag(var_i)) * annualize * 100,
+        'Volatility 24h %': (vol[:, -1] if vol.shape[1] else np.full(len(ids), np.nan)) * 100,
+    }, index=pd.Index(ids, name='id'))
+    ref = np.flatnonzero(ids == reference)
+    if len(ref):
+        b = ref[0]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            summary[f'Beta ({reference})'] = cov[:, b] / var_j[:, b]
+        summary[f'Corr ({reference})'] = corr[:, b]
+    return Analytics(ids, corr, vol, summary)
@@ -0,0 +1,141 @@
+import threading
+import time
+from typing import NamedTuple, Optional
+
+import pandas as pd
+
+# ========================
+# SHARED MARKET POLLER
+# ========================
+# One background thread per process refreshes market snapshots on a fixed
+# schedule. Every refresh publishes a brand-new DataFrame under a new version
+# number; published frames are never touched again, so sessions can read the
+# latest one without locks and must copy before mutating. A fetch may also
+# return an iterator of growing frames, each published as an incomplete
+# version until the iterator is exhausted.
+#
+# With a `store`, every complete snapshot is also written to disk and a
+# process that has nothing in memory yet serves the stored one straight away
+# (stale-while-revalidate) while the thread fetches a fresh one. A
+# `recorder` is handed every complete snapshot too, to keep their history.
+
+
+class Snapshot(NamedTuple):
+    version: int
+    currency: str
+    df: pd.DataFrame
+    fetched_at: float
+    error: Optional[str] = None
+    complete: bool = True
+    # Loaded from disk and not yet refreshed by this process
+    restored: bool = False
+
+    @property
+    def age(self) -> float:
+        return time.time() - self.fetched_at
+
+
+class MarketPoller:
+    def __init__(self, fetch, interval=30, idle_after=600, store=None, recorder=None):
+        # fetch(currency) -> DataFrame; currencies nobody asked for within
+        # `idle_after` seconds stop being polled
+        self._fetch = fetch
+        self.interval = interval
+        self.idle_after = idle_after
+        self.store = store
+        self.recorder = recorder
+        self._snapshots = {}
+        self._wanted = {}
+        self._ready = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="market-poller", daemon=True)
+        self._thread.start()
+
+    def latest(self, currency, timeout=30) -> Optional[Snapshot]:
+        """Return the newest snapshot; only a never-seen currency waits (up to `timeout`)."""
+        with self._lock:
+            self._wanted[currency] = time.time()
+            ready = self._ready.setdefault(currency, threading.Event())
+        snap = self._snapshots.get(currency)
+        if (snap is None or snap.df.empty) and self.store is not None:
+            snap = self._restore(currency) or snap
+        if snap is None:
+            self._wake.set()
+            ready.wait(timeout)
+            snap = self._snapshots.get(currency)
+        return snap
+
+    def snapshots(self):
+        """Every snapshot currently held, keyed by currency."""
+        with self._lock:
+            return dict(self._snapshots)
+
+    def _restore(self, currency):
+        loaded = self.store.load(currency)
+        if loaded is None:
+            return None
+        df, meta = loaded
+        snap = Snapshot(meta['version'], currency, df, meta['fetched_at'],
+                        complete=meta['complete'], restored=True)
+        with self._lock:
+            # The thread may have published a fresh one meanwhile
+            current = self._snapshots.get(currency)
+            if current is None or current.df.empty:
+                self._snapshots[currency] = snap._replace(error=current.error if current else None)
+            snap = self._snapshots[currency]
+        self._wake.set()
+        return snap
+
+    def _refresh(self, currency):
+        prev = self._snapshots.get(currency)
+        try:
+            result = self._fetch(currency)
+            if isinstance(result, pd.DataFrame):
+                self._publish(currency, prev, result, complete=True)
+            else:
+                # Partial frames are only shown until a complete one exists
+                last = None
+                for last in result:
+                    if prev is None or prev.df.empty or not prev.complete:
+                        prev = self._publish(currency, prev, last, complete=False)
+                if last is None:
+                    raise ValueError("fetch produced no data")
+                self._publish(currency, prev, last, complete=True)
+        except Exception as e:
+            if prev is None:
+                self._snapshots[currency] = Snapshot(0, currency, pd.DataFrame(), 0.0, str(e))
+            else:
+                self._snapshots[currency] = prev._replace(error=str(e))
+        self._ready[currency].set()
+
+    def _publish(self, currency, prev, df, complete):
+        snap = Snapshot((prev.version if prev else 0) + 1, currency, df, time.time(), complete=complete)
+        with self._lock:
+            self._snapshots[currency] = snap
+        self._ready[currency].set()
+        if complete and self.store is not None:
+            self.store.save(currency, snap)
+        if complete and self.recorder is not None:
+            self.recorder.append(currency, snap)
+        return snap
+
+    def _run(self):
+        due = {}
+        while True:
+            self._wake.clear()
+            now = time.time()
+            with self._lock:
+                for cur, seen in list(self._wanted.items()):
+                    if now - seen > self.idle_after:
+                        del self._wanted[cur]
+                        self._snapshots.pop(cur, None)
+                        self._ready.pop(cur, None)
+                        due.pop(cur, None)
+                wanted = list(self._wanted)
+            for cur in wanted:
+                if due.get(cur, 0) <= now:
+                    self._refresh(cur)
+                    due[cur] = time.time() + self.interval
+            nxt = min((due[c] for c in wanted), default=now + self.interval)
+            self._wake.wait(max(nxt - time.time(), 0.5))
@@ -0,0 +1,87 @@
+import sys
+
+import numpy as np
+import pandas as pd
+
+# ========================
+# COMPACT MARKET FRAME
+# ========================
+# coins/markets rows arrive with ~30 loosely typed fields (roi dicts, ATH/ATL
+# blocks, dates as text). Snapshots keep only the columns the UI reads, each
+# in a fixed dtype: money stays float64 (it is shown to full precision),
+# percentages are float32, ranks nullable Int32, text is pandas 3's Arrow-backed
+# `str` (requirements pin pandas>=3; on 2.x 'str' means object). The 7-day
+# sparkline becomes one float32 row of a shared matrix; its SVG is drawn from
+# the sparkline cache when a table is rendered, never stored in the frame.
+
+SCHEMA = {
+    'id': 'str', 'symbol': 'str', 'name': 'str', 'image': 'str',
+    'current_price': 'float64', 'market_cap': 'float64', 'total_volume': 'float64',
+    'market_cap_rank': 'Int32',
+    'price_change_percentage_24h': 'float32',
+    'price_change_percentage_1h_in_currency': 'float32',
+    'price_change_percentage_24h_in_currency': 'float32',
+    'price_change_percentage_7d_in_currency': 'float32',
+    'price_change_percentage_30d_in_currency': 'float32',
+}
+
+
+def sparkline_rows(column) -> list:
+    """Float32 rows of one (coins, points) matrix, right-aligned and NaN-padded."""
+    series = []
+    for x in column:
+        if isinstance(x, dict):
+            x = x.get('price')
+        series.append(x if isinstance(x, (list, tuple, np.ndarray)) else ())
+    length = max((len(s) for s in series), default=0)
+    mat = np.full((len(series), length), np.nan, dtype=np.float32)
+    for i, s in enumerate(series):
+        if len(s):
+            try:
+                mat[i, length - len(s):] = s
+            except (TypeError, ValueError):
+                mat[i, length - len(s):] = [v if isinstance(v, (int, float)) else np.nan for v in s]
+    return list(mat)
+
+
+def compact(df: pd.DataFrame, schema=SCHEMA, sparkline=None) -> pd.DataFrame:
+    """`df` cut down to the `schema` columns it has, plus `sparkline` as float32 rows."""
+    cols = {}
+    for c, dtype in schema.items():
+        if c not in df.columns:
+            continue
+        s = df[c]
+        if dtype.lower().startswith(('float', 'int')):
+            s = pd.to_numeric(s, errors='coerce')
+            if dtype.lower().startswith('int'):
+                s = s.round()
+        cols[c] = s.astype(dtype)
+    out = pd.DataFrame(cols).reset_index(drop=True)
+    if sparkline is not None and sparkline in df.columns:
+        out['sparkline'] = sparkline_rows(df[sparkline])
+    return out
+
+
+def _nested_bytes(v, seen):
+    # Payload below an object cell that memory_usage(deep=True) doesn't see
+    if isinstance(v, np.ndarray):
+        base = v.base if v.base is not None else v
+        if id(base) in seen:
+            return 0
+        seen.add(id(base))
+        return base.nbytes if v.base is not None else 0
+    if isinstance(v, dict):
+        return sum(sys.getsizeof(k) + sys.getsizeof(x) + _nested_bytes(x, seen) for k, x in v.items())
+    if isinstance(v, (list, tuple)):
+        return sum(sys.getsizeof(x) + _nested_bytes(x, seen) for x in v)
+    return 0
+
+
+def deep_size(df: pd.DataFrame) -> int:
+    """Bytes held by `df`, including what its object cells point to."""
+    total = int(df.memory_usage(index=True, deep=True).sum())
+    seen = set()
+    for c in df.columns:
+        if df[c].dtype == object:
+            total += sum(_nested_bytes(v, seen) for v in df[c])
+    return total
@@ -0,0 +1,97 @@
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import numpy as np
+import pandas as pd
+
+from cg_client import TokenBucket
+
+# ========================
+# FULL-MARKET LOADER
+# ========================
+# Pulls every coins/markets page (about 60 for ~15k coins) with a few pages in
+# flight at once; the client's token bucket keeps the total within the rate
+# limit. Pages are typed as they land and the growing frame is yielded top
+# page first, so callers can show the leaders while the long tail streams in.
+# With a `rate`, pages are also paced by a bucket of their own, so a full
+# refresh only takes that share of the client's budget and the market,
+# watch-price and history calls sharing it are not starved.
+
+PER_PAGE = 250
+# Pages/s the apps' full-market loader may use out of the client's budget
+RATE = float(os.environ.get('UNIVERSE_RATE', 0.1))
+STR_COLUMNS = ['id', 'symbol', 'name', 'image']
+NUM_COLUMNS = ['current_price', 'market_cap', 'market_cap_rank', 'total_volume',
+               'price_change_percentage_24h', 'price_change_percentage_1h_in_currency',
+               'price_change_percentage_24h_in_currency', 'price_change_percentage_7d_in_currency',
+               'price_change_percentage_30d_in_currency']
+COLUMNS = STR_COLUMNS + NUM_COLUMNS
+
+
+def page_frame(rows) -> pd.DataFrame:
+    cols = {c: [r.get(c) for r in rows] for c in STR_COLUMNS}
+    for c in NUM_COLUMNS:
+        cols[c] = np.array([r.get(c) for r in rows], dtype=np.float64)
+    return pd.DataFrame(cols, columns=COLUMNS)
+
+
+class UniverseLoader:
+    def __init__(self, cg, per_page=PER_PAGE, concurrency=8, max_pages=400, publish_every=1.0,
+                 rate=None, burst=4):
+        self.cg = cg
+        self.bucket = TokenBucket(rate, burst) if rate else None
+        self.per_page = per_page
+        self.concurrency = concurrency
+        self.max_pages = max_pages
+        self.publish_every = publish_every
+
+    def _page(self, currency, page, params):
+        if self.bucket is not None:
+            self.bucket.acquire()
+        rows = self.cg.get_coins_markets(vs_currency=currency, order='market_cap_desc',
+                                         per_page=self.per_page, page=page, **params)
+        return page_frame(rows)
+
+    def stream(self, currency, **params):
+        """Yield the frame built so far: page 1 alone, then growing snapshots, then the full market."""
+        pages, last_page, next_page = {}, None, 1
+        running = {}
+        published = 0.0
+        with ThreadPoolExecutor(self.concurrency, thread_name_prefix='universe') as pool:
+            def fill():
+                nonlocal next_page
+                while len(running) < self.concurrency and next_page <= self.max_pages and \
+                        (last_page is None or next_page <= last_page):
+                    running[pool.submit(self._page, currency, next_page, params)] = next_page
+                    next_page += 1
+            fill()
+            while running:
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for fut in done:
+                    page = running.pop(fut)
+                    frame = fut.result()
+                    if len(frame) < self.per_page:
+                        last_page = page if last_page is None else min(last_page, page)
+                    if len(frame):
+                        pages[page] = frame
+                fill()
+                if 1 not in pages or not running:
+                    continue
+                if published == 0 or time.monotonic() - published >= self.publish_every:
+                    published = time.monotonic()
+                    yield self._frame(pages, last_page)
+        yield self._frame(pages, last_page)
+
+    @staticmethod
+    def _frame(pages, last_page):
+        keep = [pages[p] for p in sorted(pages) if last_page is None or p <= last_page]
+        if not keep:
+            return page_frame([])
+        return pd.concat(keep, ignore_index=True)
+
+    def load(self, currency, **params) -> pd.DataFrame:
+        df = None
+        for df in self.stream(currency, **params):
+            pass
+        return df
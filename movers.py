@@ -0,0 +1,45 @@
+import numpy as np
+import pandas as pd
+
+# ========================
+# MOVERS RANKINGS
+# ========================
+# Built once per snapshot: every timeframe's % change column is stacked into
+# one (coins, timeframes) matrix and ranked with a single argsort. Top/bottom-k
+# queries then only walk a precomputed order, so switching timeframe, k or the
+# cap/volume floor never sorts again.
+
+
+class Rankings:
+    def __init__(self, df: pd.DataFrame, columns: dict):
+        # columns: timeframe -> % change column name (missing ones are skipped)
+        self.columns = {tf: c for tf, c in columns.items() if c in df.columns}
+        self.timeframes = list(self.columns)
+        pct = np.column_stack([pd.to_numeric(df[c], errors='coerce').to_numpy(np.float64)
+                               for c in self.columns.values()]) if self.columns else np.empty((len(df), 0))
+        self.pct = pct
+        # Unknown changes sort last for gainers; losers walk the same order
+        # backwards, so they are skipped there through `valid`
+        self.order = np.argsort(-np.where(np.isnan(pct), -np.inf, pct), axis=0, kind='stable')
+        self.valid = ~np.isnan(pct)
+        self.cap = self._col(df, 'market_cap')
+        self.volume = self._col(df, 'total_volume')
+
+    @staticmethod
+    def _col(df, c):
+        if c not in df.columns:
+            return np.zeros(len(df))
+        return np.nan_to_num(pd.to_numeric(df[c], errors='coerce').to_numpy(np.float64))
+
+    def top(self, timeframe, k=5, losers=False, min_cap=0.0, min_volume=0.0) -> np.ndarray:
+        """Row positions of the k biggest gainers (or losers) passing the floors."""
+        j = self.timeframes.index(timeframe)
+        order = self.order[:, j]
+        if losers:
+            order = order[::-1]
+        keep = self.valid[order, j]
+        if min_cap:
+            keep &= self.cap[order] >= min_cap
+        if min_volume:
+            keep &= self.volume[order] >= min_volume
+        return order[keep][:k]
@@ -0,0 +1,75 @@
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import pandas as pd
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+# ========================
+# RERUN / TICK METER
+# ========================
+# Records, per named section, the script thread's CPU time, wall time and the
+# bytes of every ForwardMsg Streamlit queues for the browser while the section
+# runs. Kept in session_state so a session can compare fragment ticks with a
+# full rerun.
+#
+# Bytes are counted by one wrapper around the script context's private
+# enqueue callback, installed the first time the context is metered and left
+# in place for its lifetime (the context outlives reruns of the session).
+# A section only reads the running total at start and stop, so one cut short
+# by st.rerun() or st.stop() just goes unrecorded; nothing is left to unwind.
+
+HISTORY = 20
+
+
+def _sent(ctx):
+    # Running total of bytes queued through `ctx`, None if it can't be counted
+    counter = getattr(ctx, '_rerun_meter_sent', None)
+    if counter is None:
+        orig = getattr(ctx, '_enqueue', None)
+        if orig is None:
+            return None
+        counter = [0]
+
+        def counting(msg):
+            counter[0] += msg.ByteSize()
+            orig(msg)
+        ctx._enqueue = counting
+        ctx._rerun_meter_sent = counter
+    return counter
+
+
+def start(name):
+    counter = _sent(get_script_run_ctx())
+    return {'name': name, 'counter': counter, 'bytes': counter[0] if counter else 0,
+            'cpu': time.thread_time(), 'wall': time.perf_counter()}
+
+
+def stop(token):
+    sent = token['counter'][0] - token['bytes'] if token['counter'] else 0
+    runs = st.session_state.setdefault('rerun_meter', {})
+    runs.setdefault(token['name'], deque(maxlen=HISTORY)).append((
+        (time.thread_time() - token['cpu']) * 1000,
+        (time.perf_counter() - token['wall']) * 1000,
+        sent,
+    ))
+
+
+@contextmanager
+def metered(name):
+    token = start(name)
+    try:
+        yield
+    finally:
+        stop(token)
+
+
+def report() -> pd.DataFrame:
+    rows = {name: pd.DataFrame(list(runs), columns=['cpu_ms', 'wall_ms', 'bytes']).mean()
+            for name, runs in st.session_state.get('rerun_meter', {}).items() if runs}
+    if not rows:
+        return pd.DataFrame(columns=['CPU ms', 'Wall ms', 'KB sent'])
+    out = pd.DataFrame(rows).T
+    return pd.DataFrame({'CPU ms': out['cpu_ms'].round(1), 'Wall ms': out['wall_ms'].round(1),
+                         'KB sent': (out['bytes'] / 1024).round(1)})
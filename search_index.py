@@ -0,0 +1,140 @@
+import bisect
+import threading
+from collections import defaultdict
+
+import numpy as np
+import pandas as pd
+
+# ========================
+# COIN SEARCH INDEX
+# ========================
+# Built once per coin list (coins/list, ~15k entries). Prefix lookups use a
+# sorted key table, i.e. a flattened trie: every symbol, id, name and name word
+# is one key and a bisect finds the whole subtree of a prefix. Fuzzy lookups
+# use trigram posting lists scored with one bincount. Results are ranked by
+# match tier (exact symbol > exact name/id > prefix > fuzzy) and market cap.
+
+EXACT_SYMBOL, EXACT_NAME, PREFIX = 4.0, 3.0, 2.0
+MIN_SIMILARITY = 0.3
+
+
+def _trigrams(s):
+    s = f"  {s} "
+    return {s[i:i + 3] for i in range(len(s) - 2)}
+
+
+def fingerprint(coins: pd.DataFrame) -> int:
+    return int(pd.util.hash_pandas_object(coins[['id', 'symbol', 'name']], index=False).sum())
+
+
+class SearchIndex:
+    def __init__(self, coins: pd.DataFrame):
+        coins = coins.dropna(subset=['id']).reset_index(drop=True)
+        self.ids = coins['id'].astype(str).to_numpy()
+        self.symbols = coins['symbol'].fillna('').astype(str).str.lower().to_numpy()
+        self.names = coins['name'].fillna('').astype(str).str.lower().to_numpy()
+        self._display = coins[['id', 'symbol', 'name']]
+        self.position = pd.Index(self.ids)
+        self.caps = np.zeros(len(self.ids))
+        self._name_len = np.array([len(n) for n in self.names], dtype=np.int32)
+
+        keys = []
+        grams = defaultdict(list)
+        for i, (cid, sym, name) in enumerate(zip(self.ids, self.symbols, self.names)):
+            for key in {sym, cid, name, *name.split()}:
+                if key:
+                    keys.append((key, i))
+            for g in _trigrams(sym) | _trigrams(name):
+                grams[g].append(i)
+        keys.sort()
+        self._keys = [k for k, _ in keys]
+        self._key_entry = np.fromiter((i for _, i in keys), dtype=np.int32, count=len(keys))
+        self._grams = {g: np.asarray(v, dtype=np.int32) for g, v in grams.items()}
+        self._gram_count = np.zeros(len(self.ids), dtype=np.int32)
+        for g, v in self._grams.items():
+            self._gram_count[v] += 1
+        self._by_symbol = defaultdict(list)
+        self._by_name = defaultdict(list)
+        for i, (cid, sym, name) in enumerate(zip(self.ids, self.symbols, self.names)):
+            self._by_symbol[sym].append(i)
+            self._by_name[name].append(i)
+            self._by_name[cid].append(i)
+
+    def set_caps(self, ids, caps):
+        # Market caps for ranking; coins missing from `ids` rank as zero cap
+        out = np.zeros(len(self.ids))
+        pos = self.position.get_indexer(pd.Index(ids))
+        ok = pos >= 0
+        out[pos[ok]] = np.nan_to_num(np.asarray(caps, dtype=np.float64)[ok])
+        self.caps = out
+
+    def describe(self, ids) -> pd.DataFrame:
+        # id/symbol/name rows for search results, in the given order
+        return self._display.iloc[self.position.get_indexer(pd.Index(ids))].reset_index(drop=True)
+
+    def _prefix(self, q):
+        lo = bisect.bisect_left(self._keys, q)
+        hi = bisect.bisect_left(self._keys, q + '\uffff', lo)
+        return self._key_entry[lo:hi]
+
+    def _fuzzy(self, q):
+        qg = _trigrams(q)
+        posting = [self._grams[g] for g in qg if g in self._grams]
+        if not posting:
+            return np.empty(0, dtype=np.int32), np.empty(0)
+        hits = np.bincount(np.concatenate(posting), minlength=len(self.ids))
+        cand = np.flatnonzero(hits)
+        h = hits[cand]
+        # Mean of Jaccard similarity and query coverage, so substrings
+        # ("coin" in "bitcoin") still qualify
+        sim = 0.5 * (h / (len(qg) + self._gram_count[cand] - h) + h / len(qg))
+        keep = sim >= MIN_SIMILARITY
+        return cand[keep], sim[keep]
+
+    def search(self, query, k=20, among=None):
+        """Top-k coin ids for `query`, best first (only ids in `among`, if given)."""
+        q = query.strip().lower()
+        if not q:
+            return []
+        # Later assignments are higher tiers, so each coin keeps its best match
+        score = np.zeros(len(self.ids))
+        cand, sim = self._fuzzy(q)
+        score[cand] = sim
+        p = self._prefix(q)
+        score[p] = PREFIX + len(q) / np.maximum(self._name_len[p], len(q))
+        score[self._by_name.get(q, [])] = EXACT_NAME
+        score[self._by_symbol.get(q, [])] = EXACT_SYMBOL
+        if among is not None:
+            # Cut to the allowed ids before the top-k, so they aren't crowded out
+            pos = self.position.get_indexer(pd.Index(among))
+            allowed = np.zeros(len(self.ids), dtype=bool)
+            allowed[pos[pos >= 0]] = True
+            score[~allowed] = 0
+        idx = np.flatnonzero(score)
+        if not len(idx):
+            return []
+        # Market cap breaks ties inside a tier without crossing tiers
+        total = score[idx] + 0.9 * np.log10(1 + self.caps[idx]) / 14
+        top = np.argpartition(-total, k - 1)[:k] if len(total) > k else np.arange(len(total))
+        return self.ids[idx[top[np.argsort(-total[top])]]].tolist()
+
+
+class SearchService:
+    # Process-wide holder: rebuilds the index only when the coin list content
+    # changes and refreshes the cap ranking once per market snapshot version
+    def __init__(self):
+        self.index = None
+        self._list_version = self._fp = self._caps_version = None
+        self._lock = threading.Lock()
+
+    def get(self, coins_snap, market_snap=None):
+        with self._lock:
+            if (coins_snap.currency, coins_snap.version) != self._list_version:
+                fp = fingerprint(coins_snap.df)
+                if fp != self._fp:
+                    self.index, self._fp, self._caps_version = SearchIndex(coins_snap.df), fp, None
+                self._list_version = (coins_snap.currency, coins_snap.version)
+            if market_snap is not None and (market_snap.currency, market_snap.version) != self._caps_version:
+                self.index.set_caps(market_snap.df['id'], market_snap.df['market_cap'])
+                self._caps_version = (market_snap.currency, market_snap.version)
+            return self.index
@@ -0,0 +1,156 @@
+import atexit
+import os
+import shutil
+import threading
+import time
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+import atomic_file
+
+# ========================
+# SNAPSHOT RECORDER
+# ========================
+# Appends the numeric columns of every published market snapshot to an
+# append-only log, so intraday rank / cap / price paths can be drawn without
+# going back to per-coin history endpoints. Rows are buffered per currency
+# and written as zstd Parquet chunks of a few minutes each, partitioned by
+# day and named by the time span they cover:
+#
+#   <root>/<name>/<currency>/<YYYY-MM-DD>/<first ms>-<last ms>.parquet
+#
+# A query opens only the chunks whose span overlaps the window and reads only
+# the columns and coins asked for. A chunk that can't be written stays in
+# the buffer (still queryable) and goes out with the next one. Without
+# pyarrow the recorder is a no-op.
+
+LOG_DIR = os.environ.get(
+    'SNAPSHOT_LOG_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'snapshot_log'))
+# A chunk is written once its buffer spans this many seconds
+CHUNK_SECONDS = 600
+KEEP_DAYS = 14
+
+
+def _day(ms):
+    return time.strftime('%Y-%m-%d', time.gmtime(ms / 1000))
+
+
+class SnapshotLog:
+    def __init__(self, name, root=LOG_DIR, chunk_seconds=CHUNK_SECONDS, keep_days=KEEP_DAYS):
+        self.root = os.path.join(root, name)
+        self.chunk_seconds = chunk_seconds
+        self.keep_days = keep_days
+        self._buffers = {}
+        self._lock = threading.Lock()
+        atexit.register(self.flush)
+
+    def append(self, currency, snap):
+        """Buffer the numeric columns of `snap` (one row per coin) under its fetch time."""
+        if pq is None or snap.df.empty or 'id' not in snap.df.columns:
+            return
+        ts = int(snap.fetched_at * 1000)
+        df = snap.df
+        rows = df[['id']].join(df.select_dtypes('number')).assign(ts=ts)
+        with self._lock:
+            buf = self._buffers.setdefault(currency, [])
+            # Chunks never straddle a day partition
+            if buf and _day(buf[0]['ts'].iat[0]) != _day(ts) and self._write(currency, buf):
+                buf = self._buffers[currency] = []
+            buf.append(rows)
+            if (ts - buf[0]['ts'].iat[0]) / 1000 >= self.chunk_seconds and self._write(currency, buf):
+                self._buffers[currency] = []
+
+    def flush(self):
+        with self._lock:
+            self._buffers = {c: buf for c, buf in self._buffers.items() if buf and not self._write(c, buf)}
+
+    def _write(self, currency, buf) -> bool:
+        """Write `buf` as one chunk per day it covers; False (nothing lost) if that fails."""
+        frame = pd.concat(buf, ignore_index=True)
+        frame['id'] = frame['id'].astype(str)
+        # Sorted by coin, so row-group statistics let id filters skip data
+        frame = frame.sort_values(['id', 'ts'], kind='stable')
+        # A buffer kept after a failed write may have crossed midnight
+        days = pd.to_datetime(frame['ts'], unit='ms').dt.strftime('%Y-%m-%d')
+        try:
+            for day, part in frame.groupby(days, sort=True):
+                first, last = int(part['ts'].min()), int(part['ts'].max())
+                folder = os.path.join(self.root, currency, day)
+                os.makedirs(folder, exist_ok=True)
+                table = pa.Table.from_pandas(part, preserve_index=False)
+                atomic_file.replace(os.path.join(folder, f'{first}-{last}.parquet'),
+                                    lambda tmp: pq.write_table(table, tmp, compression='zstd', row_group_size=8192))
+        except Exception:
+            # A retry rewrites the days already done under the same names
+            return False
+        self._expire(currency)
+        return True
+
+    def _expire(self, currency):
+        cutoff = _day((time.time() - self.keep_days * 86400) * 1000)
+        base = os.path.join(self.root, currency)
+        for day in os.listdir(base):
+            if day < cutoff:
+                shutil.rmtree(os.path.join(base, day), ignore_errors=True)
+
+    def chunks(self, currency, start_ms, end_ms):
+        """Chunk files of `currency` whose span overlaps [start_ms, end_ms], oldest first."""
+        base = os.path.join(self.root, currency)
+        if not os.path.isdir(base):
+            return []
+        out = []
+        for day in sorted(os.listdir(base)):
+            if not _day(start_ms) <= day <= _day(end_ms):
+                continue
+            for name in os.listdir(os.path.join(base, day)):
+                if not name.endswith('.parquet'):
+                    continue
+                first, last = map(int, name[:-len('.parquet')].split('-'))
+                if first <= end_ms and last >= start_ms:
+                    out.append((first, os.path.join(base, day, name)))
+        return [p for _, p in sorted(out)]
+
+    def frame(self, currency, columns, ids=None, start=None, end=None) -> pd.DataFrame:
+        """Long frame (ts, id, *columns) of recorded rows between `start` and `end` (epoch s)."""
+        lo = int((start if start is not None else 0) * 1000)
+        hi = int((end if end is not None else time.time() + 1) * 1000)
+        want = ['ts', 'id', *columns]
+        parts = []
+        # Chunk list and buffer as of one moment: a flush in between would
+        # otherwise drop its rows (or count them twice)
+        with self._lock:
+            paths = self.chunks(currency, lo, hi) if pq is not None else []
+            pending = list(self._buffers.get(currency, []))
+        if paths:
+            filters = [('ts', '>=', lo), ('ts', '<=', hi)]
+            if ids is not None:
+                filters.append(('id', 'in', list(ids)))
+            for path in paths:
+                # Chunks from before a column existed just lack it
+                have = [c for c in want if c in pq.read_schema(path).names]
+                parts.append(pq.read_table(path, columns=have, filters=filters).to_pandas())
+        for rows in pending:
+            rows = rows[(rows['ts'] >= lo) & (rows['ts'] <= hi)]
+            if ids is not None:
+                rows = rows[rows['id'].isin(ids)]
+            parts.append(rows[[c for c in want if c in rows.columns]])
+        parts = [p for p in parts if len(p)]
+        if not parts:
+            return pd.DataFrame(columns=want)
+        return pd.concat(parts, ignore_index=True).reindex(columns=want)
+
+    def query(self, currency, column, ids=None, start=None, end=None) -> pd.DataFrame:
+        """`column` for `ids` between `start` and `end`: one row per snapshot time, one column per coin."""
+        long = self.frame(currency, [column], ids, start, end)
+        wide = long.drop_duplicates(['ts', 'id'], keep='last').pivot(index='ts', columns='id', values=column)
+        wide.index = pd.to_datetime(wide.index.astype('int64'), unit='ms')
+        wide.index.name = 'timestamp'
+        if ids is not None:
+            wide = wide.reindex(columns=[i for i in ids if i in wide.columns])
+        return wide.sort_index()
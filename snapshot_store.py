@@ -0,0 +1,77 @@
+import json
+import os
+
+import pandas as pd
+
+try:
+    import pyarrow.feather as feather
+except ImportError:
+    feather = None
+
+import atomic_file
+
+# ========================
+# ON-DISK SNAPSHOT STORE
+# ========================
+# The last complete snapshot of each poller key is written as Feather (Arrow
+# IPC, lz4) next to a small JSON sidecar, so a restarted process can serve
+# the previous prices at once instead of waiting on upstream. Columns holding
+# dicts/lists (sparklines, roi) are stored as JSON text and decoded on load.
+# Without pyarrow the store is a no-op.
+
+SNAPSHOT_DIR = os.environ.get(
+    'SNAPSHOT_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'snapshots'))
+
+
+def _nested(col):
+    if col.dtype != object:
+        return False
+    return col.map(lambda v: isinstance(v, (dict, list))).any()
+
+
+class SnapshotStore:
+    def __init__(self, name, root=SNAPSHOT_DIR):
+        self.root = os.path.join(root, name)
+
+    def _paths(self, key):
+        base = os.path.join(self.root, str(key))
+        return base + '.feather', base + '.json'
+
+    def save(self, key, snap):
+        if feather is None:
+            return
+        data_path, meta_path = self._paths(key)
+        df = snap.df
+        index = None
+        if not isinstance(df.index, pd.RangeIndex):
+            index = [n or 'index' for n in df.index.names]
+            df = df.rename_axis(index)
+        df = df.reset_index(drop=index is None)
+        nested = [c for c in df.columns if _nested(df[c])]
+        df = df.assign(**{c: df[c].map(lambda v: None if v is None else json.dumps(v)) for c in nested})
+        meta = {'version': snap.version, 'fetched_at': snap.fetched_at,
+                'complete': snap.complete, 'json_columns': nested, 'index': index}
+        os.makedirs(self.root, exist_ok=True)
+        try:
+            atomic_file.replace(data_path, lambda tmp: feather.write_feather(df, tmp, compression='lz4'))
+        except Exception:
+            # A column Arrow can't type (mixed objects) just isn't persisted
+            return
+        atomic_file.replace(meta_path, lambda f: json.dump(meta, f), 'w')
+
+    def load(self, key):
+        """(DataFrame, meta) of the last saved snapshot for `key`, or None."""
+        if feather is None:
+            return None
+        data_path, meta_path = self._paths(key)
+        try:
+            with open(meta_path) as f:
+                meta = json.load(f)
+            df = feather.read_feather(data_path)
+        except (OSError, ValueError):
+            return None
+        for c in meta.get('json_columns', []):
+            df[c] = df[c].map(lambda v: json.loads(v) if isinstance(v, str) else None)
+        if meta.get('index'):
+            df = df.set_index(meta['index'])
+        return df, meta
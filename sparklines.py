@@ -0,0 +1,121 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+# ========================
+# BATCH SPARKLINE RENDERER
+# ========================
+# Renders the whole `sparkline_in_7d` column as inline SVG in one pass.
+# Series are normalized with NumPy per length group, and every result is
+# cached by a hash of its price bytes so unchanged coins are never redrawn.
+# Every Streamlit session thread shares the cache and the pool.
+
+WIDTH, HEIGHT, PAD = 120, 32, 2
+UP_COLOR, DOWN_COLOR = '#4CAF50', '#F44336'
+CACHE_SIZE = 4096
+# Misses below this count are rendered inline even when a pool is requested
+POOL_MIN_BATCH = 64
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+_pool = None
+_pool_size = 0
+_pool_lock = threading.Lock()
+
+
+def _to_series(x):
+    if isinstance(x, dict):
+        x = x.get('price')
+    if not isinstance(x, (list, tuple, np.ndarray)) or len(x) < 2:
+        return None
+    try:
+        a = np.asarray(x, dtype=np.float64)
+    except (TypeError, ValueError):
+        a = np.array([v if isinstance(v, (int, float)) else np.nan for v in x], dtype=np.float64)
+    a = a[np.isfinite(a)]
+    return a if len(a) >= 2 else None
+
+
+def _key(a):
+    return hashlib.blake2b(a.tobytes(), digest_size=16).hexdigest()
+
+
+def _render_group(mat):
+    # mat: (rows, n) float64, all rows the same length
+    n = mat.shape[1]
+    lo = mat.min(axis=1, keepdims=True)
+    span = mat.max(axis=1, keepdims=True) - lo
+    flat = span == 0
+    norm = np.where(flat, 0.5, (mat - lo) / np.where(flat, 1, span))
+    xs = np.linspace(PAD, WIDTH - PAD, n).round(1)
+    ys = (HEIGHT - PAD - norm * (HEIGHT - 2 * PAD)).round(1)
+    colors = np.where(mat[:, -1] >= mat[:, 0], UP_COLOR, DOWN_COLOR)
+    out = []
+    for row, color in zip(ys, colors):
+        pts = ' '.join(map('{:.1f},{:.1f}'.format, xs, row))
+        out.append(f"<svg xmlns='http://www.w3.org/2000/svg' width='{WIDTH}' height='{HEIGHT}' "
+                   f"viewBox='0 0 {WIDTH} {HEIGHT}' preserveAspectRatio='none'>"
+                   f"<polyline fill='none' stroke='{color}' stroke-width='1.5' "
+                   f"stroke-linejoin='round' points='{pts}'/></svg>")
+    return out
+
+
+def _render_many(series):
+    # Group by length so each group is normalized as one 2-D array
+    out = [None] * len(series)
+    groups = {}
+    for i, a in enumerate(series):
+        groups.setdefault(len(a), []).append(i)
+    for idx in groups.values():
+        for i, svg in zip(idx, _render_group(np.vstack([series[i] for i in idx]))):
+            out[i] = svg
+    return out
+
+
+def _get_pool(processes):
+    global _pool, _pool_size
+    with _pool_lock:
+        if _pool is None or _pool_size != processes:
+            if _pool is not None:
+                _pool.shutdown(wait=False)
+            _pool, _pool_size = ProcessPoolExecutor(max_workers=processes), processes
+        return _pool
+
+
+def render_sparklines(column, processes=None):
+    """Render an iterable of sparkline payloads to SVG strings ("" when unusable)."""
+    if processes is None:
+        processes = int(os.environ.get('SPARKLINE_PROCESSES', 0))
+    series = [_to_series(x) for x in column]
+    keys = [_key(a) if a is not None else None for a in series]
+    out, todo = [], {}
+    with _cache_lock:
+        for k, a in zip(keys, series):
+            if k is None:
+                out.append("")
+            elif k in _cache:
+                _cache.move_to_end(k)
+                out.append(_cache[k])
+            else:
+                todo.setdefault(k, a)
+                out.append(None)
+    if todo:
+        miss = list(todo.values())
+        if processes > 1 and len(miss) >= POOL_MIN_BATCH:
+            step = -(-len(miss) // processes)
+            chunks = [miss[i:i + step] for i in range(0, len(miss), step)]
+            svgs = [s for part in _get_pool(processes).map(_render_many, chunks) for s in part]
+        else:
+            svgs = _render_many(miss)
+        fresh = dict(zip(todo, svgs))
+        # Rendered outside the lock; only the insert and eviction hold it
+        with _cache_lock:
+            _cache.update(fresh)
+            while len(_cache) > CACHE_SIZE:
+                _cache.popitem(last=False)
+        out = [fresh[k] if s is None else s for k, s in zip(keys, out)]
+    return out
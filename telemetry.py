@@ -0,0 +1,219 @@
+import functools
+import os
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import pandas as pd
+
+# ========================
+# PIPELINE TELEMETRY
+# ========================
+# Process-wide counters and latency histograms: app stages (`stage`), every
+# upstream HTTP attempt (`upstream`, fed by CoinGeckoClient) and Streamlit
+# cache hits/misses (`cache_data` / `cache_resource`). Shown as DataFrames in
+# the apps' admin panel and served in Prometheus text format by `serve`.
+
+PORT = int(os.environ.get('TELEMETRY_PORT', 9464))
+# Histogram upper bounds in seconds (Prometheus `le` buckets; +Inf implied)
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0)
+
+_lock = threading.Lock()
+# name -> labels tuple -> value / [bucket counts..., +Inf count, sum]
+_counters = defaultdict(lambda: defaultdict(float))
+_histograms = defaultdict(dict)
+_help = {
+    'stage_seconds': 'Wall time of an app pipeline stage.',
+    'upstream_seconds': 'Latency of one upstream HTTP attempt.',
+    'upstream_requests_total': 'Upstream HTTP attempts by endpoint and status.',
+    'upstream_coalesced_total': 'Calls answered by an identical request already in flight.',
+    'cache_requests_total': 'Streamlit cache lookups by cache and result.',
+    'snapshot_age_seconds': 'Age of the market snapshot a rerun was served.',
+}
+
+
+def inc(name, labels=(), value=1.0):
+    with _lock:
+        _counters[name][tuple(labels)] += value
+
+
+def observe(name, labels, seconds):
+    i = int(np.searchsorted(BUCKETS, seconds))
+    with _lock:
+        h = _histograms[name].get(tuple(labels))
+        if h is None:
+            h = _histograms[name][tuple(labels)] = [0] * (len(BUCKETS) + 1) + [0.0]
+        h[i] += 1
+        h[-1] += seconds
+
+
+@contextmanager
+def stage(name):
+    """Time a block (or, as a decorator, a function) into `stage_seconds`."""
+    t = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe('stage_seconds', (name,), time.perf_counter() - t)
+
+
+def endpoint(path):
+    # Collapse per-coin paths so every coin shares one series
+    parts = path.strip('/').split('/')
+    if parts[0] == 'coins' and len(parts) > 2:
+        parts[1] = '{id}'
+    return '/'.join(parts)
+
+
+def upstream(path, status, seconds):
+    ep = endpoint(path)
+    inc('upstream_requests_total', (ep, str(status)))
+    observe('upstream_seconds', (ep,), seconds)
+
+
+def _cached(kind, name, kwargs):
+    import streamlit as st
+
+    def deco(f):
+        label = name or f.__name__
+
+        @functools.wraps(f)
+        def compute(*args, **kw):
+            inc('cache_requests_total', (label, 'miss'))
+            return f(*args, **kw)
+        cached = getattr(st, kind)(**kwargs)(compute)
+
+        @functools.wraps(f)
+        def call(*args, **kw):
+            inc('cache_requests_total', (label, 'call'))
+            return cached(*args, **kw)
+        call.clear = cached.clear
+        return call
+    return deco
+
+
+def cache_data(name=None, **kwargs):
+    """`st.cache_data` that also counts lookups and misses under `name`."""
+    return _cached('cache_data', name, kwargs)
+
+
+def cache_resource(name=None, **kwargs):
+    """`st.cache_resource` that also counts lookups and misses under `name`."""
+    return _cached('cache_resource', name, kwargs)
+
+
+# ---- reports ----
+
+def _quantile(h, q):
+    # Upper bound of the bucket holding the q-th observation
+    counts = np.asarray(h[:-1])
+    if not counts.sum():
+        return np.nan
+    i = int(np.searchsorted(np.cumsum(counts), q * counts.sum()))
+    return BUCKETS[i] if i < len(BUCKETS) else np.inf
+
+
+def stage_report() -> pd.DataFrame:
+    with _lock:
+        items = [(k[0], list(h)) for k, h in _histograms.get('stage_seconds', {}).items()]
+    rows = {s: {'Calls': sum(h[:-1]), 'Mean ms': 1000 * h[-1] / max(sum(h[:-1]), 1),
+                'p50 ≤ ms': 1000 * _quantile(h, 0.5), 'p95 ≤ ms': 1000 * _quantile(h, 0.95)}
+            for s, h in items}
+    return pd.DataFrame.from_dict(rows, orient='index').round(1).sort_index()
+
+
+def upstream_report() -> pd.DataFrame:
+    with _lock:
+        reqs = dict(_counters.get('upstream_requests_total', {}))
+        lat = {k[0]: list(h) for k, h in _histograms.get('upstream_seconds', {}).items()}
+        merged = dict(_counters.get('upstream_coalesced_total', {}))
+    if not reqs:
+        return pd.DataFrame()
+    out = pd.Series(reqs).unstack(fill_value=0).astype(int)
+    out['coalesced'] = pd.Series({k[0]: v for k, v in merged.items()}).reindex(out.index).fillna(0).astype(int)
+    out['p95 ≤ ms'] = [1000 * _quantile(lat[ep], 0.95) if ep in lat else np.nan for ep in out.index]
+    return out.sort_index()
+
+
+def cache_report() -> pd.DataFrame:
+    with _lock:
+        c = dict(_counters.get('cache_requests_total', {}))
+    if not c:
+        return pd.DataFrame(columns=['Calls', 'Misses', 'Hit rate'])
+    out = pd.Series(c).unstack(fill_value=0).reindex(columns=['call', 'miss'], fill_value=0)
+    return pd.DataFrame({'Calls': out['call'].astype(int), 'Misses': out['miss'].astype(int),
+                         'Hit rate': (1 - out['miss'] / out['call'].where(out['call'] > 0)).round(3)})
+
+
+# ---- Prometheus export ----
+
+_label_names = {
+    'stage_seconds': ('stage',),
+    'upstream_seconds': ('endpoint',),
+    'upstream_requests_total': ('endpoint', 'status'),
+    'upstream_coalesced_total': ('endpoint',),
+    'cache_requests_total': ('cache', 'result'),
+    'snapshot_age_seconds': ('currency',),
+}
+
+
+def _labels(name, values, extra=()):
+    pairs = list(zip(_label_names.get(name, ()), values)) + list(extra)
+    if not pairs:
+        return ''
+    esc = (lambda v: str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+    return '{' + ','.join(f'{k}="{esc(v)}"' for k, v in pairs) + '}'
+
+
+def render() -> str:
+    """All metrics in the Prometheus text exposition format."""
+    lines = []
+    with _lock:
+        for name, series in sorted(_counters.items()):
+            lines += [f'# HELP {name} {_help.get(name, name)}', f'# TYPE {name} counter']
+            lines += [f'{name}{_labels(name, k)} {v:g}' for k, v in sorted(series.items())]
+        for name, series in sorted(_histograms.items()):
+            lines += [f'# HELP {name} {_help.get(name, name)}', f'# TYPE {name} histogram']
+            for k, h in sorted(series.items()):
+                cum = np.cumsum(h[:-1])
+                for le, n in zip([*map(str, BUCKETS), '+Inf'], cum):
+                    lines.append(f'{name}_bucket{_labels(name, k, [("le", le)])} {n}')
+                lines.append(f'{name}_sum{_labels(name, k)} {h[-1]:.6f}')
+                lines.append(f'{name}_count{_labels(name, k)} {cum[-1]}')
+    return '\n'.join(lines) + '\n'
+
+
+_server = None
+
+
+def serve(port=PORT, host='127.0.0.1'):
+    """Serve `render()` at http://host:port/metrics once per process; None if the port is taken."""
+    global _server
+    with _lock:
+        if _server is not None:
+            return _server
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                if self.path.split('?')[0] != '/metrics':
+                    self.send_error(404)
+                    return
+                body = render().encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        try:
+            _server = ThreadingHTTPServer((host, port), Handler)
+        except OSError:
+            return None
+        threading.Thread(target=_server.serve_forever, daemon=True, name='telemetry').start()
+        return _server
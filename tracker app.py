@@ -1,17 +1,35 @@
 import streamlit as st
 import pandas as pd
-from pycoingecko import CoinGeckoAPI
-import plotly.graph_objects as go
-import requests
-import base64
-from io import BytesIO
+import time
 from streamlit_lottie import st_lottie
 import streamlit.components.v1 as components
+import assets
+from sparklines import render_sparklines
+import market_schema
+from market_poller import MarketPoller
+from snapshot_store import SnapshotStore
+from snapshot_log import SnapshotLog
+from watch_prices import WatchPrices, WATCH_INTERVAL
+from streamlit import runtime
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+from cg_client import CoinGeckoClient
+from search_index import SearchService
+import market_analytics
+from movers import Rankings
+from alerts import AlertBook
+import telemetry
+import rerun_meter
+from rerun_meter import metered
+try:
+    from st_aggrid import AgGrid, GridOptionsBuilder, JsCode
+except ImportError:
+    AgGrid = None
 
 # ========================
 # APP CONFIGURATION & CSS
 # ========================
 st.set_page_config(page_title="CRYPTO TRACKEE", page_icon="💸", layout="wide")
+full_run = rerun_meter.start("Full rerun")
 st.markdown("""
 <style>
 @import url('https://fonts.googleapis.com/css2?family=Kanit:wght@400;700&family=Orbitron:wght@500&display=swap');
@@ -32,12 +50,7 @@ st.markdown("""
 # HEADER + LOTTIE
 # ========================
 def load_lottie(url):
-    try:
-        r = requests.get(url, timeout=10)
-        r.raise_for_status()
-        return r.json()
-    except:
-        return None
+    return assets.load_json(url)
 
 with st.container():
     _, mid, _ = st.columns([1,3,1])
@@ -50,9 +63,10 @@ with st.container():
 # ========================
 # HELPERS & DATA LOADER
 # ========================
-@st.cache_resource
-def get_cg(): return CoinGeckoAPI()
+@telemetry.cache_resource()
+def get_cg(): return CoinGeckoClient()
 cg = get_cg()
+metrics_server = telemetry.serve()
 
 def abbreviate_number(num: float) -> str:
     for unit in ['','K','M','B','T']:
@@ -61,28 +75,31 @@ def abbreviate_number(num: float) -> str:
         num /= 1000
     return f"{num:.2f}E"
 
+def ago(seconds):
+    if seconds < 120: return f"{seconds:.0f}s"
+    if seconds < 7200: return f"{seconds/60:.0f} min"
+    return f"{seconds/3600:.0f} h"
+
 def format_currency(n, cur):
     s = abbreviate_number(n)
     return f"${s}" if cur=='usd' else f"{s} {cur.upper()}"
 
-def create_sparkline(prices):
-    # ... same as before ...
-    if not isinstance(prices, list) or len(prices)<2: return ""
-    s = pd.to_numeric(pd.Series(prices),errors='coerce').dropna().tolist()
-    if len(s)<2: return ""
-    fig = go.Figure(go.Scatter(x=list(range(len(s))), y=s, mode='lines',
-        line=dict(color='#4CAF50' if s[-1]>=s[0] else '#F44336', width=2)))
-    fig.update_layout(... )  # omitted for brevity
-    buf = BytesIO(); fig.write_image(buf,format='png',engine='kaleido')
-    return f"data:image/png;base64,{base64.b64encode(buf.getvalue()).decode()}"
-
-@st.cache_data(ttl=30)
-def load_market_data(cur):
+# Columns the UI reads; everything else CoinGecko sends is dropped per snapshot
+MARKET_SCHEMA = {
+    'id': 'str', 'name': 'str', 'Symbol': 'str', 'Logo': 'str',
+    'current_price': 'float64', 'market_cap': 'float64', 'total_volume': 'float64',
+    'market_cap_rank': 'int32', '1h %': 'float32', '24h %': 'float32', '7d %': 'float32', '30d %': 'float32',
+}
+MOVER_COLUMNS = {'1h': '1h %', '24h': '24h %', '7d': '7d %', '30d': '30d %'}
+
+@telemetry.stage('fetch_market_data')
+def fetch_market_data(cur):
     data = cg.get_coins_markets(vs_currency=cur, order='market_cap_desc',
                                 per_page=250, sparkline=True,
-                                price_change_percentage='24h,7d,30d')
+                                price_change_percentage='1h,24h,7d,30d')
     df = pd.DataFrame(data)
     # compute % columns, uppercase symbols, etc.
+    df['1h %']  = pd.to_numeric(df['price_change_percentage_1h_in_currency'], errors='coerce').fillna(0)
     df['24h %'] = pd.to_numeric(df['price_change_percentage_24h_in_currency'], errors='coerce').fillna(0)
     df['7d %']  = pd.to_numeric(df['price_change_percentage_7d_in_currency'], errors='coerce').fillna(0)
     df['30d %'] = pd.to_numeric(df['price_change_percentage_30d_in_currency'], errors='coerce').fillna(0)
@@ -92,8 +109,96 @@ def load_market_data(cur):
     df['market_cap']     = pd.to_numeric(df['market_cap'], errors='coerce').fillna(0)
     df['total_volume']   = pd.to_numeric(df['total_volume'], errors='coerce').fillna(0)
     df['market_cap_rank']= pd.to_numeric(df['market_cap_rank'], errors='coerce').fillna(0).astype(int)
-    df['7d Sparkline']   = df['sparkline_in_7d'].apply(lambda x: create_sparkline(x['price']) if isinstance(x,dict) else "")
-    return df
+    return market_schema.compact(df, MARKET_SCHEMA, sparkline='sparkline_in_7d')
+
+# Pollers persist their last snapshot, so a restarted process serves the
+# previous data at once and refreshes it in the background. Market snapshots
+# are also appended to a columnar log for the intraday views
+@telemetry.cache_resource()
+def get_snapshot_log(): return SnapshotLog('tracker_markets')
+
+@telemetry.cache_resource()
+def get_poller():
+    return MarketPoller(fetch_market_data, interval=30, store=SnapshotStore('tracker_markets'),
+                        recorder=get_snapshot_log())
+
+@telemetry.cache_resource()
+def get_currencies_poller():
+    return MarketPoller(lambda _: pd.DataFrame({'currency': sorted(cg.get_supported_vs_currencies())}),
+                        interval=3600, store=SnapshotStore('currencies'))
+
+def load_supported_currencies():
+    snap = get_currencies_poller().latest('all', timeout=15)
+    if snap is None or snap.df.empty:
+        return ['usd']
+    return snap.df['currency'].tolist()
+
+@telemetry.cache_resource()
+def get_coins_list_poller():
+    return MarketPoller(lambda _: pd.DataFrame(cg.get_coins_list()), interval=3600,
+                        store=SnapshotStore('coins_list'))
+
+@telemetry.cache_resource()
+def get_search_service(): return SearchService()
+
+@telemetry.cache_resource()
+def get_watch_prices(): return WatchPrices(cg)
+
+@telemetry.stage('search_coins')
+def search_coins(query, market_snap, k=50):
+    # Ranked with the full coins/list index, among the loaded rows only;
+    # returns their positions
+    coins = get_coins_list_poller().latest('all', timeout=5)
+    if coins is None or coins.df.empty:
+        coins = market_snap
+    ids = get_search_service().get(coins, market_snap).search(query, k, among=market_snap.df['id'])
+    pos = pd.Index(market_snap.df['id']).get_indexer(ids)
+    return pos[pos >= 0]
+
+@telemetry.cache_data(max_entries=8, show_spinner=False)
+@telemetry.stage('analytics')
+def load_analytics(cur, version, _df):
+    # Keyed by snapshot version: one pass per poll, shared by every session
+    return market_analytics.analyze(_df, column='sparkline')
+
+@telemetry.cache_data(max_entries=8, show_spinner=False)
+@telemetry.stage('movers')
+def load_movers(cur, version, _df):
+    # Every timeframe ranked in one pass per snapshot; k, floors and the
+    # timeframe are then just lookups
+    return Rankings(_df, MOVER_COLUMNS)
+
+INTRADAY_COLUMNS = {'Rank': 'market_cap_rank', 'Price': 'current_price', 'Market cap': 'market_cap',
+                    'Volume': 'total_volume'}
+
+@telemetry.cache_data(max_entries=16, show_spinner=False)
+@telemetry.stage('intraday')
+def load_intraday(cur, column, ids, hours, version):
+    # Keyed by snapshot version, which is when the log gains a row
+    return get_snapshot_log().query(cur, column, list(ids), start=time.time() - hours * 3600)
+
+# Every session's alert rules, checked in one pass per new snapshot. Rules
+# of a session whose browser tab has gone away expire with it
+ALERT_LABELS = {'price': 'Price', 'change_24h': '24h %', 'change_7d': '7d %', 'rsi': 'RSI (1h)'}
+
+def session_alive(session_id):
+    return runtime.exists() and runtime.get_instance().is_active_session(session_id)
+
+@telemetry.cache_resource()
+def get_alert_book():
+    return AlertBook({'price': 'current_price', 'change_24h': '24h %', 'change_7d': '7d %'}, sparkline='sparkline',
+                     alive=session_alive)
+
+@telemetry.stage('load_market_data')
+def load_market_data(cur):
+    snap = get_poller().latest(cur)
+    if snap is None or snap.df.empty:
+        st.error(f"Market data unavailable: {snap.error if snap else 'timed out'}")
+        st.stop()
+    telemetry.observe('snapshot_age_seconds', (cur,), snap.age)
+    with telemetry.stage('alerts'):
+        get_alert_book().evaluate(snap, source='markets')
+    return snap
 
 # ========================
 # SESSION / SIDEBAR
@@ -105,45 +210,114 @@ st.session_state.setdefault('search_query', "")
 with st.sidebar:
     st.image("https://assets.coingecko.com/coins/images/1/large/bitcoin.png", width=100)
     st.header("⚙️ Settings")
-    supported = sorted(cg.get_supported_vs_currencies())
+    supported = load_supported_currencies()
     currency  = st.selectbox("Currency", supported, index=supported.index('usd'))
-    timeframe = st.selectbox("Movers Timeframe", ['24h','7d','30d'], index=1)
+    timeframe = st.selectbox("Movers Timeframe", list(MOVER_COLUMNS), index=2)
+    movers_k  = st.slider("Movers shown", 3, 25, 5)
+    floors    = [0, 1e6, 1e7, 1e8, 1e9]
+    min_cap   = st.selectbox("Movers min. market cap", floors,
+                             format_func=lambda v: f"≥ {abbreviate_number(v)}" if v else "Any")
+    min_vol   = st.selectbox("Movers min. 24h volume", floors,
+                             format_func=lambda v: f"≥ {abbreviate_number(v)}" if v else "Any")
+    auto      = st.toggle("Live prices", value=False,
+                          help="Redraw only the price sections (metrics, movers, table, watchlist) every interval.")
     refresh   = st.slider("Auto-Refresh (s)", 10, 300, 30)
+    modes     = (["Grid", "Classic"] if AgGrid else ["Classic"])
+    table_mode= st.radio("Table", modes, horizontal=True,
+                         help="Grid sends all rows as one paginated, virtualized component; "
+                              "Classic draws a widget row per coin.")
 
-df = load_market_data(currency)
+snap = load_market_data(currency)
+df = snap.df
+if snap.error:
+    st.warning(f"⚠️ CoinGecko is unavailable ({snap.error}). Showing prices from {ago(snap.age)} ago.")
+elif snap.restored:
+    st.info(f"Showing saved prices from {ago(snap.age)} ago while fresh ones load.")
+
+# Price-bearing sections are fragments: in live mode only they rerun, each
+# re-reading the poller's latest snapshot; header, CSS and charts stay put
+live = st.fragment(run_every=refresh if auto else None)
+# The watchlist ticks faster, off the shared simple/price feed
+watch_live = st.fragment(run_every=min(refresh, WATCH_INTERVAL) if auto else None)
+
+def current_snap():
+    return load_market_data(currency) if auto else snap
 
 def toggle_wl(cid):
     wl = st.session_state.watchlist
     if cid in wl: wl.remove(cid)
     else:        wl.append(cid)
 
+@watch_live
+@metered("Watchlist tick")
 def display_watchlist():
-    st.sidebar.markdown("---")
-    st.sidebar.subheader("⭐ Watchlist")
-    if not st.session_state.watchlist:
-        st.sidebar.info("Click ★ in the table to add.")
-        return
-    sub = df[df['id'].isin(st.session_state.watchlist)]
-    for _,r in sub.iterrows():
-        c1,c2 = st.sidebar.columns([1,4])
-        c1.image(r['Logo'], width=32)
-        pct,clr = r['24h %'], '#4CAF50' if r['24h %']>=0 else '#F44336'
-        c2.markdown(f"**{r['name']}**<br>"
-                    f"{r['current_price']:.4f} {currency.upper()} "
-                    f"<span style='color:{clr};'>{pct:+.2f}%</span>",
-                    unsafe_allow_html=True)
-
-display_watchlist()
+    s = current_snap()
+    for e in get_alert_book().events(get_script_run_ctx().session_id):
+        st.toast(f"🔔 {e['coin']}: {ALERT_LABELS[e['metric']]} {'≥' if e['above'] else '≤'} "
+                 f"{e['threshold']:g} (now {e['value']:.4g})")
+    st.caption(f"Prices updated {s.age:.0f}s ago")
+    st.markdown("---")
+    st.subheader("⭐ Watchlist")
+    wl = st.session_state.watchlist
+    if not wl:
+        st.info("Click ★ in the table to add.")
+    else:
+        # Live simple/price quotes where the feed has them, snapshot otherwise
+        quotes, qsnap = get_watch_prices().quotes(get_script_run_ctx().session_id, currency, wl)
+        sub = s.df[s.df['id'].isin(wl)].set_index('id')
+        price = quotes['price'].reindex(sub.index).fillna(sub['current_price'])
+        pct = quotes['change_24h'].reindex(sub.index).fillna(sub['24h %'])
+        rows = [f"<img src='{logo}' width=24 style='vertical-align:middle;margin-right:6px'/>"
+                f"<b>{name}</b><br>{p:.4f} {currency.upper()} "
+                f"<span style='color:{'#4CAF50' if c>=0 else '#F44336'};'>{c:+.2f}%</span>"
+                for logo,name,p,c in zip(sub['Logo'], sub['name'], price, pct)]
+        st.markdown("<br>".join(rows), unsafe_allow_html=True)
+        if qsnap is not None and not qsnap.df.empty:
+            st.caption(f"Watchlist quotes {ago(qsnap.age)} old")
+    with st.expander("⏱ Refresh cost"):
+        st.dataframe(rerun_meter.report(), use_container_width=True)
+
+def display_alerts():
+    book, me = get_alert_book(), get_script_run_ctx().session_id
+    with st.expander("🔔 Alerts"):
+        with st.form("new_alert", clear_on_submit=True, border=False):
+            # Watched coins first
+            wl = st.session_state.watchlist
+            ids = [c for c in wl if c in set(df['id'])] + [c for c in df['id'] if c not in wl]
+            coin = st.selectbox("Coin", ids, format_func=dict(zip(df['id'], df['name'])).get)
+            metric = st.selectbox("When", book.metrics, format_func=ALERT_LABELS.get)
+            above = st.radio("Goes", ["above", "below"], horizontal=True) == "above"
+            threshold = st.number_input("Threshold", value=0.0, format="%.4f")
+            cooldown = st.selectbox("Repeat at most every", [300, 3600, 86400],
+                                    index=1, format_func=ago)
+            if st.form_submit_button("Add alert"):
+                book.add(me, coin, currency, metric, above, threshold, cooldown)
+        mine = book.rules(me)
+        if not mine.empty:
+            st.dataframe(mine.assign(metric=mine['metric'].map(ALERT_LABELS),
+                                     above=mine['above'].map({True: '≥', False: '≤'})),
+                         use_container_width=True)
+            drop = st.selectbox("Remove rule", mine.index)
+            if st.button("Remove"):
+                book.remove(drop, me)
+                st.rerun()
+
+with st.sidebar:
+    display_watchlist()
+    display_alerts()
 
 # ========================
 # TABLE RENDERING
 # ========================
+@telemetry.stage('render_table')
 def render_table(data):
     specs=[0.3,2.5,1.5,0.8,1.8,1.8,0.5]
     hdrs=["#","Coin",f"Price ({currency.upper()})","24h %","Market Cap","7d Sparkline","★"]
     cols = st.columns(specs)
     for c,h in zip(cols,hdrs): c.markdown(f"**{h}**")
-    for i,r in data.iterrows():
+    # SVGs come from the sparkline cache; the frame only holds the prices
+    svgs = render_sparklines(data['sparkline'])
+    for svg,(i,r) in zip(svgs, data.iterrows()):
         c0,c1,c2,c3,c4,c5,c6 = st.columns(specs)
         cid=r['id']
         with c6:
@@ -164,15 +338,88 @@ def render_table(data):
             if c1.button(name,key=btn):
                 st.session_state.selected_coin=cid; st.session_state.search_query=""; st.rerun()
         c2.write(f"{r['current_price']:.4f}")
-        pct,clr=r['24h %'], '#4CAF50' if pct>=0 else '#F44336'
+        pct=r['24h %']; clr='#4CAF50' if pct>=0 else '#F44336'
         c3.markdown(f"<span style='color:{clr};font-weight:bold'>{pct:+.2f}%</span>",unsafe_allow_html=True)
         c4.write(format_currency(r['market_cap'],currency))
-        if r['7d Sparkline']:
-            c5.image(r['7d Sparkline'],use_container_width=True)
+        if svg:
+            c5.image(svg,use_container_width=True)
         else:
             c5.write("–")
         st.markdown("<hr style='margin:4px 0; border-color:#333;'>", unsafe_allow_html=True)
 
+# ========================
+# VIRTUALIZED GRID
+# ========================
+# One AG Grid component instead of ~9 widgets per row: rows travel as a single
+# payload, only the visible page is drawn, and star edits rerun just this
+# fragment. Selecting a row opens the detail view.
+if AgGrid:
+    HTML_RENDERER = JsCode("""
+    class HtmlRenderer {
+      init(p) { this.eGui = document.createElement('span'); this.eGui.innerHTML = p.value || '–'; }
+      getGui() { return this.eGui; }
+      refresh() { return false; }
+    }""")
+    COIN_RENDERER = JsCode("""
+    class CoinRenderer {
+      init(p) {
+        this.eGui = document.createElement('span');
+        const logo = p.data.Logo ? `<img src="${p.data.Logo}" width="18" style="vertical-align:middle;margin-right:6px"/>` : '';
+        this.eGui.innerHTML = logo + p.value;
+      }
+      getGui() { return this.eGui; }
+      refresh() { return false; }
+    }""")
+    PCT_STYLE = JsCode("function(p) { return {color: p.value >= 0 ? '#4CAF50' : '#F44336', fontWeight: 'bold'}; }")
+    PCT_FORMAT = JsCode("function(p) { return (p.value >= 0 ? '+' : '') + p.value.toFixed(2) + '%'; }")
+    ABBREV_FORMAT = JsCode("""
+    function(p) {
+      let n = p.value, u = ['', 'K', 'M', 'B', 'T'], i = 0;
+      while (Math.abs(n) >= 1000 && i < u.length - 1) { n /= 1000; i++; }
+      return n.toFixed(2) + u[i];
+    }""")
+
+@telemetry.stage('render_grid')
+def render_grid(data):
+    wl = st.session_state.watchlist
+    grid = pd.DataFrame({
+        'id': data['id'], '#': data['market_cap_rank'], '★': data['id'].isin(wl),
+        'Coin': data['name'] + " (" + data['Symbol'] + ")", 'Logo': data['Logo'],
+        'Price': data['current_price'], '24h %': data['24h %'],
+        'Market Cap': data['market_cap'], '7d Sparkline': render_sparklines(data['sparkline']),
+    })
+    gb = GridOptionsBuilder.from_dataframe(grid)
+    gb.configure_default_column(sortable=True, resizable=True, editable=False)
+    gb.configure_column('id', hide=True)
+    gb.configure_column('Logo', hide=True)
+    gb.configure_column('#', width=70)
+    gb.configure_column('★', width=70, editable=True, cellDataType='boolean')
+    gb.configure_column('Coin', cellRenderer=COIN_RENDERER, flex=2, filter=True)
+    gb.configure_column('Price', header_name=f"Price ({currency.upper()})",
+                        valueFormatter=JsCode("function(p) { return p.value.toFixed(4); }"))
+    gb.configure_column('24h %', cellStyle=PCT_STYLE, valueFormatter=PCT_FORMAT)
+    gb.configure_column('Market Cap', valueFormatter=ABBREV_FORMAT)
+    gb.configure_column('7d Sparkline', cellRenderer=HTML_RENDERER, sortable=False, width=150)
+    gb.configure_selection('single')
+    gb.configure_pagination(paginationAutoPageSize=False, paginationPageSize=50)
+    gb.configure_grid_options(getRowId=JsCode("function(p) { return p.data.id; }"), rowHeight=36)
+    resp = AgGrid(grid, gridOptions=gb.build(), height=640, key="market_grid",
+                  allow_unsafe_jscode=True, update_on=['cellValueChanged', 'selectionChanged'])
+
+    # Stars: sync the edited ★ column back into the watchlist
+    if resp.data is not None and '★' in resp.data:
+        starred = set(resp.data.loc[resp.data['★'].astype(bool), 'id'])
+        shown = set(grid['id'])
+        st.session_state.watchlist = [c for c in wl if c not in shown or c in starred] + \
+                                     [c for c in grid['id'] if c in starred and c not in wl]
+    # Selection: only a new selection navigates, so coming back doesn't bounce
+    sel = resp.selected_rows
+    cid = sel.iloc[0]['id'] if sel is not None and len(sel) else None
+    if cid != st.session_state.get('grid_selection'):
+        st.session_state.grid_selection = cid
+        if cid:
+            st.session_state.selected_coin=cid; st.session_state.search_query=""; st.rerun()
+
 # ========================
 # OVERVIEW
 # ========================
@@ -180,7 +427,68 @@ def display_overview():
     q = st.text_input("🔍 Search", st.session_state.search_query)
     if q!=st.session_state.search_query:
         st.session_state.search_query=q; st.rerun()
+    display_prices()
+    display_market_table(q)
+    display_analytics()
+    display_intraday()
+
+def display_analytics():
+    with st.expander("🧮 Cross-market analytics (7d)"):
+        a = load_analytics(currency, snap.version, df)
+        st.caption("Correlation, volatility and beta from the 7-day sparklines already loaded, "
+                   "no extra API calls. Volatility is annualized.")
+        top = st.slider("Coins in heatmap", 5, 50, 20)
+        import plotly.graph_objects as go
+        labels = df['Symbol'].iloc[:top].tolist()
+        fig = go.Figure(go.Heatmap(z=a.corr[:top, :top], x=labels, y=labels, zmin=-1, zmax=1,
+                                   colorscale='RdBu', reversescale=True))
+        fig.update_layout(height=520, yaxis_autorange='reversed',
+                          paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)')
+        st.plotly_chart(fig, use_container_width=True)
+        summary = df[['id', 'name', 'Symbol']].join(a.summary, on='id').drop(columns='id')
+        st.dataframe(summary.set_index('name').round(2), use_container_width=True)
 
+def display_intraday():
+    with st.expander("🕒 Intraday (recorded snapshots)"):
+        c1, c2, c3 = st.columns(3)
+        label = c1.selectbox("Column", list(INTRADAY_COLUMNS))
+        hours = c2.selectbox("Window", [1, 6, 24, 72], index=2, format_func=lambda h: f"{h} h")
+        top = c3.slider("Coins", 5, 50, 20, key='intraday_top')
+        coins = df.head(top)
+        wide = load_intraday(currency, INTRADAY_COLUMNS[label], tuple(coins['id']), hours, snap.version)
+        if len(wide) < 2:
+            st.info("Snapshots are recorded as the market table refreshes; "
+                    "the intraday views fill in after a few of them.")
+            return
+        import plotly.graph_objects as go
+        symbol = coins.set_index('id')['Symbol']
+        symbols = symbol.reindex(wide.columns).tolist()
+        if label == 'Rank':
+            z, scale, title = wide, 'Viridis', "Market-cap rank"
+        else:
+            z = (wide / wide.bfill().iloc[0] - 1) * 100
+            scale, title = 'RdYlGn', f"{label} change since {wide.index[0]:%H:%M} UTC (%)"
+        fig = go.Figure(go.Heatmap(z=z.T.to_numpy(), x=z.index, y=symbols, colorscale=scale,
+                                   zmid=None if label == 'Rank' else 0, reversescale=label == 'Rank'))
+        fig.update_layout(title=title, height=520, yaxis_autorange='reversed',
+                          paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)')
+        st.plotly_chart(fig, use_container_width=True)
+        # Rank changes over the window, from the same log
+        ranks = wide if label == 'Rank' else load_intraday(
+            currency, 'market_cap_rank', tuple(coins['id']), hours, snap.version)
+        ranks = ranks.where(ranks > 0)
+        moves = pd.DataFrame({'Symbol': symbol.reindex(ranks.columns),
+                              'Rank then': ranks.bfill().iloc[0], 'Rank now': ranks.ffill().iloc[-1]})
+        moves['Change'] = moves['Rank then'] - moves['Rank now']
+        moves = moves.dropna().sort_values('Change', key=abs, ascending=False)
+        st.caption(f"{len(wide)} snapshots since {wide.index[0]:%Y-%m-%d %H:%M} UTC")
+        st.dataframe(moves.set_index('Symbol').astype(int), use_container_width=True)
+
+@live
+@metered("Metrics & movers tick")
+def display_prices():
+    s = current_snap()
+    df = s.df
     # Key metrics
     st.subheader("Key Metrics")
     bcol,ecol,_ = st.columns([1,1,2])
@@ -193,13 +501,15 @@ def display_overview():
             col.metric(f"{sym} Price","N/A","N/A")
 
     # Styled Gainers/Losers
-    st.subheader(f"Top 5 Gainers & Losers ({timeframe})")
-    pctcol={'24h':'24h %','7d':'7d %','30d':'30d %'}[timeframe]
-    g5 = df.nlargest(5,pctcol)[['name','Symbol',pctcol]].set_index('name')
-    l5 = df.nsmallest(5,pctcol)[['name','Symbol',pctcol]].set_index('name')
-    def highlight(s): return ['color:green' if v>=0 else 'color:red' for v in s]
-    gtable = g5.style.format({pctcol:'{:+.2f}%'}).apply(highlight,subset=[pctcol])
-    ltable = l5.style.format({pctcol:'{:+.2f}%'}).apply(highlight,subset=[pctcol])
+    st.subheader(f"Top {movers_k} Gainers & Losers ({timeframe})")
+    pctcol=MOVER_COLUMNS[timeframe]
+    ranks = load_movers(currency, s.version, df)
+    def pick(losers):
+        rows = ranks.top(timeframe, movers_k, losers, min_cap, min_vol)
+        return df.iloc[rows][['name','Symbol',pctcol]].set_index('name')
+    def highlight(s): return s.ge(0).map({True:'color:green', False:'color:red'})
+    gtable = pick(False).style.format({pctcol:'{:+.2f}%'}).apply(highlight,subset=[pctcol])
+    ltable = pick(True).style.format({pctcol:'{:+.2f}%'}).apply(highlight,subset=[pctcol])
     gcol,lcol=st.columns(2)
     with gcol:
         st.write("🔥 Gainers"); st.dataframe(gtable,use_container_width=True)
@@ -207,12 +517,15 @@ def display_overview():
         st.write("❄️ Losers");   st.dataframe(ltable,use_container_width=True)
     st.markdown("---")
 
-    # Table
-    if st.session_state.search_query:
-        mask = df['name'].str.contains(q,case=False)|df['Symbol'].str.contains(q,case=False)
-        render_table(df[mask])
+@live
+@metered("Table tick")
+def display_market_table(q):
+    s = current_snap()
+    show = render_grid if table_mode == "Grid" else render_table
+    if q:
+        show(s.df.iloc[search_coins(q, s)])
     else:
-        render_table(df)
+        show(s.df)
 
 # ========================
 # DETAIL VIEW + TRADINGVIEW
@@ -248,3 +561,19 @@ if st.session_state.selected_coin:
     display_details()
 else:
     display_overview()
+
+# Admin panel (?admin=1): stage latencies, upstream calls and cache hit rates
+if st.query_params.get('admin'):
+    with st.sidebar.expander("🛠 Telemetry", expanded=True):
+        st.caption(f"Prometheus text at http://127.0.0.1:{telemetry.PORT}/metrics" if metrics_server
+                   else f"Metrics endpoint not started (port {telemetry.PORT} in use)")
+        st.write("**Stages**"); st.dataframe(telemetry.stage_report(), use_container_width=True)
+        st.write("**Upstream calls**"); st.dataframe(telemetry.upstream_report(), use_container_width=True)
+        st.write("**Caches**"); st.dataframe(telemetry.cache_report(), use_container_width=True)
+        st.write("**Snapshot memory**")
+        mem = [{'Snapshot': f"{name}:{cur}", 'Rows': len(s.df), 'KB': market_schema.deep_size(s.df) / 1024}
+               for name, p in [('markets', get_poller()), ('coins_list', get_coins_list_poller())]
+               for cur, s in p.snapshots().items()]
+        st.dataframe(pd.DataFrame(mem).round(1), use_container_width=True)
+
+rerun_meter.stop(full_run)
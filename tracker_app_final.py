@@ -1,20 +1,31 @@
 import streamlit as st
 import pandas as pd
-from pycoingecko import CoinGeckoAPI
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
-import requests
-import base64
-from io import BytesIO
 from streamlit_lottie import st_lottie
-import streamlit.components.v1 as components
 import numpy as np
-import ta
-from streamlit_option_menu import option_menu
-import json
-import os
-from datetime import datetime, timedelta
 import time
+import assets
+from market_poller import MarketPoller
+from snapshot_store import SnapshotStore
+from watch_prices import WatchPrices, WATCH_INTERVAL
+from streamlit import runtime
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+import history_store
+from history_store import HistoryStore
+from cg_client import CoinGeckoClient
+import market_universe
+from market_universe import UniverseLoader
+import fx
+import market_schema
+from movers import Rankings
+from alerts import AlertBook
+from backtest import STRATEGIES
+from search_index import SearchService
+import downsample
+import candles
+from indicators import IndicatorEngine
+import telemetry
 
 # APP CONFIGURATION & CSS
 st.set_page_config(page_title="CRYPTO TRACKEE", page_icon="💸", layout="wide")
@@ -65,12 +76,7 @@ st.markdown("""
 
 # HEADER + LOTTIE
 def load_lottie(url):
-    try:
-        r = requests.get(url, timeout=10)
-        r.raise_for_status()
-        return r.json()
-    except:
-        return None
+    return assets.load_json(url)
 
 with st.container():
     header_col1, header_col2, header_col3 = st.columns([1, 2, 1])
@@ -84,8 +90,10 @@ with st.container():
         st.markdown("<div style='text-align: center; font-family: Poppins, sans-serif; font-size: 1.2rem; color: rgba(255, 255, 255, 0.8); margin-top: 10px; animation: fadeInUp 1s ease;'>Your Gateway to Cryptocurrency Market Intelligence</div>", unsafe_allow_html=True)
 
 # MAIN APP LOGIC
-@st.cache_resource
-def get_cg(): return CoinGeckoAPI()
+metrics_server = telemetry.serve()
+
+@telemetry.cache_resource()
+def get_cg(): return CoinGeckoClient()
 try:
     cg = get_cg()
 except Exception as e:
@@ -93,9 +101,83 @@ except Exception as e:
     st.stop()
 
 # Market Data
-@st.cache_data(ttl=30)
-def load_market_data(currency):
-    return pd.DataFrame(cg.get_coins_markets(vs_currency=currency, per_page=250, price_change_percentage='1h,24h,7d'))
+@telemetry.stage('fetch_market_data')
+def fetch_market_data(currency):
+    return market_schema.compact(pd.DataFrame(
+        cg.get_coins_markets(vs_currency=currency, per_page=250, price_change_percentage='1h,24h,7d,30d')))
+
+# Pollers persist their last snapshot, so a restarted process serves the
+# previous data at once and refreshes it in the background
+@telemetry.cache_resource()
+def get_poller(): return MarketPoller(fetch_market_data, interval=30, store=SnapshotStore('markets'))
+
+# Every coins/markets page; streamed in, so the first version holds page 1 only.
+# A full pass is ~60 pages paced at market_universe.RATE, so it refreshes
+# every half hour rather than eating the budget the other pollers share
+@telemetry.cache_resource()
+def get_universe_poller():
+    loader = UniverseLoader(cg, concurrency=2, rate=market_universe.RATE)
+    stream = lambda cur: map(market_schema.compact, loader.stream(cur, price_change_percentage='1h,24h,7d,30d'))
+    return MarketPoller(stream, interval=1800,
+                        store=SnapshotStore('universe'))
+
+@telemetry.cache_resource()
+def get_fx_poller(): return MarketPoller(lambda _: fx.fetch_rates(cg), interval=300, store=SnapshotStore('fx_rates'))
+
+# Bitcoin's percent changes in each display currency, which rebase the base
+# snapshot's percent columns (see fx.convert)
+@telemetry.cache_resource()
+def get_fx_moves_poller():
+    return MarketPoller(lambda cur: fx.fetch_moves(cg, cur), interval=300, store=SnapshotStore('fx_moves'))
+
+# Every session's alert rules, checked in one pass per new snapshot. Rules
+# of a session whose browser tab has gone away expire with it
+ALERT_LABELS = {'price': 'Price', 'change_24h': '24h %', 'change_7d': '7d %'}
+
+def session_alive(session_id):
+    return runtime.exists() and runtime.get_instance().is_active_session(session_id)
+
+@telemetry.cache_resource()
+def get_alert_book():
+    return AlertBook({'price': 'current_price', 'change_24h': 'price_change_percentage_24h_in_currency',
+                      'change_7d': 'price_change_percentage_7d_in_currency'}, alive=session_alive)
+
+def market_inputs(currency, full_market=False):
+    # One base-currency snapshot serves every currency via the FX vector:
+    # (base snapshot, rates, moves). Only currencies the rates don't quote,
+    # or whose moves failed to load, read their own snapshot: (snap, None, None)
+    poller = get_universe_poller() if full_market else get_poller()
+    rates = get_fx_poller().latest('btc')
+    if rates is not None and not rates.df.empty and fx.factor(rates.df, fx.BASE_CURRENCY, currency) is not None:
+        snap = poller.latest(fx.BASE_CURRENCY)
+        # Never waited on: until bitcoin's moves arrive the percent columns
+        # show as unknown, so switching currency stays instant
+        moves = get_fx_moves_poller().latest(currency, timeout=0) if currency != fx.BASE_CURRENCY else None
+        if snap is not None and not snap.df.empty and (moves is None or not moves.df.empty):
+            return snap, rates, moves
+    return poller.latest(currency), None, None
+
+def moves_pending(currency):
+    return currency != fx.BASE_CURRENCY and get_fx_moves_poller().latest(currency, timeout=0) is None
+
+@telemetry.stage('load_market_data')
+def load_market_data(currency, full_market=False):
+    snap, rates, moves = market_inputs(currency, full_market)
+    df = snap.df if snap is not None else None
+    version = snap.version if snap is not None else 0
+    if rates is not None:
+        df = fx.convert(df, rates.df, fx.BASE_CURRENCY, currency, moves.df if moves else None)
+        # A converted frame changes with the rates too, so caches and alert
+        # checks keyed by version see new rates as a new snapshot
+        version = (snap.version, rates.version, moves.version if moves else 0)
+    if df is None or df.empty:
+        st.error(f"Market data unavailable: {snap.error if snap else 'timed out'}")
+        st.stop()
+    telemetry.observe('snapshot_age_seconds', (currency,), snap.age)
+    snap = snap._replace(currency=currency, df=df, version=version)
+    with telemetry.stage('alerts'):
+        get_alert_book().evaluate(snap, source='universe' if full_market else 'markets')
+    return snap
 
 # UI Components
 # Create a sidebar with currency options and watchlist
@@ -147,18 +229,121 @@ with st.sidebar:
     
     # Display selected currency info
     st.info(f"Selected: {selected_currency_display}")
+    full_market = st.checkbox("🌐 Full market (all coins)", value=False)
     
-df = load_market_data(currency)
+snap = load_market_data(currency, full_market)
+df = snap.df
+if snap.error:
+    st.warning(f"⚠️ CoinGecko is unavailable ({snap.error}). Showing prices from {snap.age / 60:.0f} min ago.")
+elif snap.restored:
+    st.info(f"Showing saved prices from {snap.age / 60:.0f} min ago while fresh ones load.")
+
+# Watched coins refresh on their own, off one simple/price feed shared by
+# every session, without refetching the market or rerunning the page
+@telemetry.cache_resource()
+def get_watch_prices(): return WatchPrices(cg)
+
+@st.fragment(run_every=WATCH_INTERVAL)
+def display_watchlist(ids):
+    quotes, qsnap = get_watch_prices().quotes(get_script_run_ctx().session_id, currency, ids)
+    sub = df[df['id'].isin(ids)].set_index('id')
+    st.dataframe(pd.DataFrame({
+        'Coin': sub['name'],
+        f'Price ({currency.upper()})': quotes['price'].reindex(sub.index).fillna(sub['current_price']),
+        '24h %': quotes['change_24h'].reindex(sub.index).fillna(sub['price_change_percentage_24h']),
+    }), hide_index=True, use_container_width=True,
+        column_config={f'Price ({currency.upper()})': st.column_config.NumberColumn(format="%.4f"),
+                       '24h %': st.column_config.NumberColumn(format="%+.2f%%")})
+    if qsnap is not None and not qsnap.df.empty:
+        st.caption(f"Quotes {qsnap.age:.0f}s old")
+
+# While the full market streams in, only this caption polls for new pages;
+# the page reruns once, when the last one has landed
+@st.fragment(run_every=2)
+def universe_progress():
+    # The same snapshot load_market_data builds the page from
+    s = market_inputs(currency, full_market=True)[0]
+    if s is not None and s.complete and not s.df.empty:
+        st.rerun()
+    st.caption(f"{len(s.df if s is not None else df):,} coins loaded (loading more…)")
+
+# Percent changes in a newly picked currency fill in once bitcoin's moves in
+# it arrive (a second or two); the page reruns then
+@st.fragment(run_every=1)
+def fx_moves_progress():
+    if not moves_pending(currency):
+        st.rerun()
+    st.caption(f"Loading % changes in {currency.upper()}…")
 
 with st.sidebar:
+    st.caption(f"Prices updated {snap.age:.0f}s ago")
+    if full_market and snap.complete:
+        st.caption(f"{len(df):,} coins loaded")
+    elif full_market:
+        universe_progress()
+    if moves_pending(currency):
+        fx_moves_progress()
     st.write("### Watchlist")
     watchlist = st.multiselect('Add to Watchlist', df['name'])
+    if watchlist:
+        display_watchlist(df.loc[df['name'].isin(watchlist), 'id'].tolist())
+
+# Alerts are checked as snapshots arrive; the feed polls for what fired and
+# only rebuilds the market frame once a poller has published something new
+@st.fragment(run_every=WATCH_INTERVAL)
+def alert_feed():
+    versions = tuple(s.version if s is not None else None for s in market_inputs(currency, full_market))
+    if st.session_state.get('alert_inputs') != versions:
+        st.session_state.alert_inputs = versions
+        load_market_data(currency, full_market)
+    for e in get_alert_book().events(get_script_run_ctx().session_id):
+        st.toast(f"🔔 {e['coin']}: {ALERT_LABELS[e['metric']]} {'≥' if e['above'] else '≤'} "
+                 f"{e['threshold']:g} (now {e['value']:.4g})")
+
+with st.sidebar:
+    book, me = get_alert_book(), get_script_run_ctx().session_id
+    with st.expander("🔔 Alerts"):
+        with st.form("new_alert", clear_on_submit=True, border=False):
+            coin = st.selectbox("Coin", df['id'], format_func=dict(zip(df['id'], df['name'])).get)
+            metric = st.selectbox("When", book.metrics, format_func=ALERT_LABELS.get)
+            above = st.radio("Goes", ["above", "below"], horizontal=True) == "above"
+            threshold = st.number_input("Threshold", value=0.0, format="%.4f")
+            if st.form_submit_button("Add alert"):
+                book.add(me, coin, currency, metric, above, threshold)
+        mine = book.rules(me)
+        if not mine.empty:
+            st.dataframe(mine.assign(metric=mine['metric'].map(ALERT_LABELS),
+                                     above=mine['above'].map({True: '≥', False: '≤'})),
+                         use_container_width=True)
+            drop = st.selectbox("Remove rule", mine.index)
+            if st.button("Remove"):
+                book.remove(drop, me)
+                st.rerun()
+        if not mine.empty:
+            alert_feed()
+
+# Search runs over the full coins/list, not just the loaded snapshot
+@telemetry.cache_resource()
+def get_coins_list_poller():
+    return MarketPoller(lambda _: pd.DataFrame(cg.get_coins_list()), interval=3600,
+                        store=SnapshotStore('coins_list'))
+
+@telemetry.cache_resource()
+def get_search_service(): return SearchService()
+
+def search_coins(query, market_snap, k=50):
+    coins = get_coins_list_poller().latest('all', timeout=5)
+    if coins is None or coins.df.empty:
+        coins = market_snap
+    index = get_search_service().get(coins, market_snap)
+    found = index.describe(index.search(query, k))
+    return found.merge(market_snap.df.drop(columns=['symbol', 'name']), on='id', how='left')
 
 st.subheader("🔍 Search Cryptocurrency")
 search_query = st.text_input("Search for a cryptocurrency")
 
 if search_query:
-    filtered_data = df[df['name'].str.contains(search_query, case=False, na=False)]
+    filtered_data = search_coins(search_query, snap)
 else:
     filtered_data = df
 
@@ -167,20 +352,38 @@ st.write("Showing results for:", search_query or "All")
 def hyperlink_coin_names(row):
     return f"[**{row['name']}**](#chart-{row['symbol']})"
 
-filtered_data['name'] = filtered_data.apply(hyperlink_coin_names, axis=1)
+filtered_data = filtered_data.assign(name=filtered_data.apply(hyperlink_coin_names, axis=1))
 st.write(filtered_data[['name', 'symbol', 'current_price', 'market_cap', 'price_change_percentage_24h']], unsafe_allow_html=True)
 
 # Top Gainers and Losers
-st.subheader("📈 Top 10 Gainers / 📉 Losers")
-timeframe = st.selectbox("Select Timeframe", ['1h', '24h', '7d'])
-gainers = df.nlargest(10, f'price_change_percentage_{timeframe}_in_currency')
-losers = df.nsmallest(10, f'price_change_percentage_{timeframe}_in_currency')
+MOVER_COLUMNS = {tf: f'price_change_percentage_{tf}_in_currency' for tf in ['1h', '24h', '7d', '30d']}
+
+# Every timeframe ranked in one pass per snapshot; k, floors and the
+# timeframe are then just lookups
+@telemetry.cache_data(max_entries=8, show_spinner=False)
+@telemetry.stage('movers')
+def load_movers(currency, version, full_market, _df):
+    return Rankings(_df, MOVER_COLUMNS)
+
+mover_cols = st.columns(4)
+with mover_cols[0]:
+    timeframe = st.selectbox("Select Timeframe", list(MOVER_COLUMNS))
+with mover_cols[1]:
+    movers_k = st.slider("Coins per table", 3, 50, 10)
+floors = [0, 1e6, 1e7, 1e8, 1e9]
+with mover_cols[2]:
+    min_cap = st.selectbox("Min. market cap", floors, format_func=lambda v: f"≥ {v:,.0f}" if v else "Any")
+with mover_cols[3]:
+    min_vol = st.selectbox("Min. 24h volume", floors, format_func=lambda v: f"≥ {v:,.0f}" if v else "Any")
+st.subheader(f"📈 Top {movers_k} Gainers / 📉 Losers")
+ranks = load_movers(currency, snap.version, full_market, df)
+mover_view = ['name', 'symbol', MOVER_COLUMNS[timeframe]]
 
 st.write("### Gainers")
-st.dataframe(gainers[['name', 'symbol', f'price_change_percentage_{timeframe}_in_currency']], height=200)
+st.dataframe(df.iloc[ranks.top(timeframe, movers_k, False, min_cap, min_vol)][mover_view], height=200)
 
 st.write("### Losers")
-st.dataframe(losers[['name', 'symbol', f'price_change_percentage_{timeframe}_in_currency']], height=200)
+st.dataframe(df.iloc[ranks.top(timeframe, movers_k, True, min_cap, min_vol)][mover_view], height=200)
 
 # Details Section
 st.subheader("📊 Cryptocurrency Details and Advanced Chart")
@@ -198,7 +401,7 @@ st.write(f"**Symbol**: {crypto_data['symbol'].upper()}")
 # Get currency symbol for display
 currency_symbol = selected_currency_display.split('(')[1].split(')')[0]
 st.write(f"**Current Price**: {currency_symbol}{crypto_data['current_price']:,.2f}")
-if crypto_data['market_cap']:
+if pd.notna(crypto_data['market_cap']) and crypto_data['market_cap']:
     st.write(f"**Market Cap**: {currency_symbol}{crypto_data['market_cap']:,.0f}")
 else:
     st.write(f"**Market Cap**: N/A")
@@ -206,7 +409,7 @@ else:
 st.write("### Advanced Chart")
 
 # Enhanced time frame options
-col1, col2 = st.columns(2)
+col1, col2, col3, col4 = st.columns(4)
 with col1:
     time_frame_options = {
         '1 Hour': 1/24,
@@ -223,6 +426,15 @@ with col1:
 with col2:
     chart_type = st.selectbox("📈 Chart Type", ['Candlestick', 'Line', 'Area'], index=0)
 
+with col3:
+    # LTTB keeps the line's shape, Min/Max keeps every extreme, Full sends
+    # every stored point (drawn with WebGL once it gets long)
+    chart_detail = st.selectbox("🎯 Detail", ['LTTB', 'Min/Max', 'Full'], index=0)
+
+with col4:
+    candle_choice = st.selectbox("🕯️ Candles", ['Auto', *candles.RESOLUTIONS], index=0,
+                                 disabled=chart_type != 'Candlestick')
+
 # Technical indicators selection
 st.write("#### Technical Indicators")
 indicator_cols = st.columns(4)
@@ -236,34 +448,74 @@ with indicator_cols[3]:
     show_bollinger = st.checkbox("Bollinger Bands", value=False)
 
 # Advanced Chart with Technical Indicators
+@telemetry.cache_resource()
+def get_history_store(): return HistoryStore(cg)
+
+@telemetry.stage('get_coin_history')
 def get_coin_history(coin_id, days=30):
     try:
-        data = cg.get_coin_market_chart_by_id(coin_id, vs_currency=currency, days=days)
-        prices = data['prices']
-        df_hist = pd.DataFrame(prices, columns=['timestamp', 'price'])
-        df_hist['timestamp'] = pd.to_datetime(df_hist['timestamp'], unit='ms')
-        df_hist.set_index('timestamp', inplace=True)
-        return df_hist
+        return get_history_store().window(coin_id, currency, days)
     except Exception as e:
         st.error(f"Error loading chart data: {e}")
         return pd.DataFrame()
 
-def create_advanced_chart(df_hist, coin_name):
+@telemetry.cache_resource()
+def get_indicator_engine(): return IndicatorEngine()
+
+@telemetry.cache_resource()
+def get_candle_engine(): return candles.CandleEngine()
+
+@telemetry.stage('candles')
+def get_candles(coin_id, df_hist, resolution):
+    # Candles are resampled from the whole stored series and cached per
+    # resolution, so switching resolution never goes back to the API
+    points = get_history_store().stored(coin_id, currency, chart_days)
+    c = get_candle_engine().candles(coin_id, currency, points['ts'], points['price'], resolution,
+                                    history_store.tier(chart_days))
+    width = candles.RESOLUTIONS[resolution][0]
+    i = np.searchsorted(c['ts'], df_hist.index[0].value // 10**6 - width, side='right')
+    return {f: v[i:] for f, v in c.items()}
+
+@telemetry.stage('indicators')
+def get_indicators(coin_id, df_hist, names):
+    # Indicators run over the whole stored series (so windows start warmed up)
+    # and are then cut down to the rows of the requested window
+    points = get_history_store().stored(coin_id, currency, chart_days)
+    values = get_indicator_engine().compute(coin_id, currency, points['ts'], points['price'], names,
+                                            history_store.tier(chart_days))
+    i = np.searchsorted(points['ts'], df_hist.index[0].value // 10**6)
+    return pd.DataFrame({k: v[i:i + len(df_hist)] for k, v in values.items()}, index=df_hist.index)
+
+# Rows of the window that get drawn. Cached per window content, so reruns on
+# an unchanged window skip the downsampling pass
+@telemetry.cache_data(max_entries=64, show_spinner=False)
+@telemetry.stage('downsample')
+def chart_rows(coin_id, cur, first_ts, last_ts, length, detail, _ts, _prices):
+    if detail == 'LTTB':
+        return downsample.lttb(_ts, _prices)
+    if detail == 'Min/Max':
+        return downsample.minmax(_prices)
+    return np.arange(length)
+
+def create_advanced_chart(df_hist, coin_id, coin_name):
     if df_hist.empty:
         st.warning("No historical data available")
         return
     
 # Calculate technical indicators
-    if show_sma:
-        df_hist['SMA_20'] = ta.trend.sma_indicator(df_hist['price'], window=20)
-        df_hist['SMA_50'] = ta.trend.sma_indicator(df_hist['price'], window=50)
-    if show_rsi:
-        df_hist['RSI'] = ta.momentum.rsi(df_hist['price'], window=14)
-    if show_macd:
-        df_hist['MACD'] = ta.trend.macd(df_hist['price'])
-    if show_bollinger:
-        df_hist['Bollinger_High'] = ta.volatility.bollinger_hband(df_hist['price'])
-        df_hist['Bollinger_Low'] = ta.volatility.bollinger_lband(df_hist['price'])
+    names = (['SMA_20', 'SMA_50'] if show_sma else []) + (['RSI'] if show_rsi else []) + \
+            (['MACD'] if show_macd else []) + (['Bollinger'] if show_bollinger else [])
+    ind = get_indicators(coin_id, df_hist, names)
+    ts = df_hist.index.asi8
+    rows = chart_rows(coin_id, currency, int(ts[0]), int(ts[-1]), len(ts), chart_detail,
+                      ts, df_hist['price'].to_numpy())
+    # Every trace is cut to the same rows, so overlays stay aligned with price
+    df_hist, ind = df_hist.iloc[rows], ind.iloc[rows]
+    Scatter = go.Scattergl if len(rows) > downsample.WEBGL_THRESHOLD else go.Scatter
+    # Epoch milliseconds as a float array go out base64-packed, under half
+    # the size of one ISO string per point
+    x = (ts[rows] // 10**6).astype(np.float64)
+    built = time.perf_counter()
     # Create subplots
     fig = make_subplots(
         rows=3, cols=1,
@@ -273,37 +525,48 @@ def create_advanced_chart(df_hist, coin_name):
     )
     
     # Price chart
-    fig.add_trace(
-        go.Scatter(x=df_hist.index, y=df_hist['price'], name='Price', line=dict(color='#00D4AA')),
-        row=1, col=1
-    )
+    if chart_type == 'Candlestick':
+        resolution = candles.auto_resolution(chart_days) if candle_choice == 'Auto' else candle_choice
+        c = get_candles(coin_id, df_hist, resolution)
+        fig.add_trace(
+            go.Candlestick(x=c['ts'].astype(np.float64), open=c['open'], high=c['high'], low=c['low'],
+                           close=c['close'], name=f'Price ({resolution})',
+                           increasing_line_color='#00D4AA', decreasing_line_color='#FF6B6B'),
+            row=1, col=1
+        )
+    else:
+        fig.add_trace(
+            Scatter(x=x, y=df_hist['price'], name='Price', line=dict(color='#00D4AA'),
+                    fill='tozeroy' if chart_type == 'Area' else None),
+            row=1, col=1
+        )
     
     # Add moving averages if selected
     if show_sma:
         fig.add_trace(
-            go.Scatter(x=df_hist.index, y=df_hist['SMA_20'], name='SMA 20', line=dict(color='#FF6B6B', width=1)),
+            Scatter(x=x, y=ind['SMA_20'], name='SMA 20', line=dict(color='#FF6B6B', width=1)),
             row=1, col=1
         )
         fig.add_trace(
-            go.Scatter(x=df_hist.index, y=df_hist['SMA_50'], name='SMA 50', line=dict(color='#4ECDC4', width=1)),
+            Scatter(x=x, y=ind['SMA_50'], name='SMA 50', line=dict(color='#4ECDC4', width=1)),
             row=1, col=1
         )
     
     # Add Bollinger Bands if selected
     if show_bollinger:
         fig.add_trace(
-            go.Scatter(x=df_hist.index, y=df_hist['Bollinger_High'], name='Bollinger High', line=dict(color='#FF9F43', width=1)),
+            Scatter(x=x, y=ind['Bollinger_High'], name='Bollinger High', line=dict(color='#FF9F43', width=1)),
             row=1, col=1
         )
         fig.add_trace(
-            go.Scatter(x=df_hist.index, y=df_hist['Bollinger_Low'], name='Bollinger Low', line=dict(color='#FF9F43', width=1)),
+            Scatter(x=x, y=ind['Bollinger_Low'], name='Bollinger Low', line=dict(color='#FF9F43', width=1)),
             row=1, col=1
         )
     
     # RSI if selected
     if show_rsi:
         fig.add_trace(
-            go.Scatter(x=df_hist.index, y=df_hist['RSI'], name='RSI', line=dict(color='#FFE66D')),
+            Scatter(x=x, y=ind['RSI'], name='RSI', line=dict(color='#FFE66D')),
             row=2, col=1
         )
         fig.add_hline(y=70, line_dash="dash", line_color="red", row=2, col=1)
@@ -312,7 +575,7 @@ def create_advanced_chart(df_hist, coin_name):
     # MACD if selected
     if show_macd:
         fig.add_trace(
-            go.Scatter(x=df_hist.index, y=df_hist['MACD'], name='MACD', line=dict(color='#FF9F43')),
+            Scatter(x=x, y=ind['MACD'], name='MACD', line=dict(color='#FF9F43')),
             row=3, col=1
         )
     
@@ -325,32 +588,117 @@ def create_advanced_chart(df_hist, coin_name):
         font=dict(color='white'),
         title=f"Technical Analysis for {coin_name}"
     )
+    fig.update_xaxes(type='date', rangeslider_visible=False)
+    telemetry.observe('stage_seconds', ('build_figure',), time.perf_counter() - built)
     
-    st.plotly_chart(fig, use_container_width=True)
+    with telemetry.stage('plotly_chart'):
+        st.plotly_chart(fig, use_container_width=True)
 
 # Home button for returning to main page
 if st.button('Home'):
     st.experimental_rerun()
 
-# Use the selected time frame
-chart_days = int(time_frame_options[selected_timeframe])
+# Use the selected time frame (fractional days for the hour windows)
+chart_days = time_frame_options[selected_timeframe]
 
 with st.spinner("Loading chart data..."):
     hist_data = get_coin_history(selected_crypto, chart_days)
     if not hist_data.empty:
-        create_advanced_chart(hist_data, crypto_data['name'])
+        create_advanced_chart(hist_data, selected_crypto, crypto_data['name'])
 
-# Additional crypto details
+# Additional crypto details (unranked long-tail coins of the full market
+# have NA ranks and often NaN changes or volume)
 st.write("### Additional Information")
 col1, col2, col3 = st.columns(3)
 with col1:
-    st.metric("24h Change", f"{crypto_data['price_change_percentage_24h']:.2f}%")
+    change = crypto_data.get('price_change_percentage_24h')
+    st.metric("24h Change", f"{change:.2f}%" if pd.notna(change) else "N/A")
 with col2:
-    st.metric("Market Cap Rank", crypto_data.get('market_cap_rank', 'N/A'))
+    rank = crypto_data.get('market_cap_rank')
+    st.metric("Market Cap Rank", int(rank) if pd.notna(rank) else "N/A")
 with col3:
     volume = crypto_data.get('total_volume', 0)
-    if volume:
+    if pd.notna(volume) and volume:
         st.metric("24h Volume", f"{currency_symbol}{volume:,.0f}")
     else:
         st.metric("24h Volume", "N/A")
 
+# Strategy backtest over the top coins: histories come from the local store
+# (missing ones are fetched a few at a time), the strategy runs on a process
+# pool over one shared price matrix. Both happen on a background job shared
+# by every session asking for the same run; the page only polls its progress
+@telemetry.cache_resource()
+def get_backtester():
+    from backtest import Backtester
+    return Backtester()
+
+@telemetry.cache_resource(max_entries=16, ttl=3600, show_spinner=False)
+def get_backtest_job(cur, ids, days, strategy, params):
+    from backtest import BacktestJob
+    store, start = get_history_store(), time.time() - days * 86400
+    @telemetry.stage('backtest_history')
+    def load(cid):
+        try:
+            points = store.refresh(cid, cur, days)
+        except Exception:
+            return None
+        points = points[np.searchsorted(points['ts'], int(start * 1000)):]
+        return points['ts'], points['price']
+    # On the spacing of the stored series the window is served from
+    step = history_store.TIERS[history_store.tier(days)][1] * 1000
+    return BacktestJob(get_backtester(), load, ids, strategy, dict(params), step,
+                       bars_per_year=365 * 86400 * 1000 // step)
+
+@st.fragment(run_every=1)
+def backtest_progress(job):
+    if job.done:
+        st.rerun()
+    if job.loaded < job.total:
+        st.progress(job.loaded / job.total, text=f"Loading histories: {job.loaded}/{job.total} coins")
+    else:
+        st.progress(1.0, text="Backtesting...")
+
+st.write("### 🧪 Strategy Backtest")
+with st.expander("Run a strategy across the top coins"):
+    b1, b2, b3 = st.columns(3)
+    with b1:
+        bt_strategy = st.selectbox("Strategy", list(STRATEGIES), format_func=lambda s: STRATEGIES[s][0])
+    with b2:
+        bt_coins = st.slider("Coins", 1, min(250, len(df)), min(50, len(df)))
+    with b3:
+        bt_days = st.selectbox("Window", [30, 90, 180, 365], index=3, format_func=lambda d: f"{d} days")
+    defaults = STRATEGIES[bt_strategy][1]
+    bt_params = tuple((k, c.number_input(k, value=v, key=f"bt_{bt_strategy}_{k}"))
+                      for c, (k, v) in zip(st.columns(len(defaults)), defaults.items()))
+    bt_key = (currency, tuple(df['id'].head(bt_coins)), bt_days, bt_strategy, bt_params)
+    if st.button("Run backtest"):
+        st.session_state.backtest = bt_key
+    job = get_backtest_job(*bt_key) if st.session_state.get('backtest') == bt_key else None
+    if job is not None and not job.done:
+        backtest_progress(job)
+    elif job is not None and job.error is not None:
+        st.error(f"Backtest failed: {job.error}")
+        get_backtest_job.clear(*bt_key)
+    elif job is not None:
+        table = job.result
+        names = df.set_index('id')['name']
+        st.caption(f"{len(table)} coins · median return {table['Return %'].median():+.1f}% "
+                   f"vs buy & hold {table['Buy & Hold %'].median():+.1f}% · ranked by Sharpe")
+        st.dataframe(table.assign(Coin=names.reindex(table.index)).set_index('Coin'), use_container_width=True,
+                     column_config={c: st.column_config.NumberColumn(format="%.2f")
+                                    for c in ['Return %', 'Buy & Hold %', 'Max Drawdown %', 'Sharpe', 'Exposure %']})
+
+# Admin panel (?admin=1): stage latencies, upstream calls and cache hit rates
+if st.query_params.get('admin'):
+    with st.sidebar.expander("🛠 Telemetry", expanded=True):
+        st.caption(f"Prometheus text at http://127.0.0.1:{telemetry.PORT}/metrics" if metrics_server
+                   else f"Metrics endpoint not started (port {telemetry.PORT} in use)")
+        st.write("**Stages**"); st.dataframe(telemetry.stage_report(), use_container_width=True)
+        st.write("**Upstream calls**"); st.dataframe(telemetry.upstream_report(), use_container_width=True)
+        st.write("**Caches**"); st.dataframe(telemetry.cache_report(), use_container_width=True)
+        st.write("**Snapshot memory**")
+        mem = [{'Snapshot': f"{name}:{cur}", 'Rows': len(s.df), 'KB': market_schema.deep_size(s.df) / 1024}
+               for name, p in [('markets', get_poller()), ('universe', get_universe_poller()),
+                               ('coins_list', get_coins_list_poller())]
+               for cur, s in p.snapshots().items()]
+        st.dataframe(pd.DataFrame(mem).round(1), use_container_width=True)
@@ -0,0 +1,65 @@
+import threading
+import time
+
+import pandas as pd
+
+from market_poller import MarketPoller
+
+# ========================
+# WATCHLIST PRICE FEED
+# ========================
+# Watched coins refresh faster than the full market snapshot. Every session
+# registers its watchlist; one poller thread turns the union of all watched
+# ids and currencies into a few deduplicated simple/price calls (a few bytes
+# per coin instead of a coins/markets page) and publishes one quotes frame
+# that every session reads.
+
+WATCH_INTERVAL = 10
+# Ids per simple/price call, keeping the query string well under URL limits
+IDS_PER_CALL = 250
+QUOTE_COLUMNS = ['id', 'currency', 'price', 'change_24h', 'updated_at']
+
+
+class WatchPrices:
+    def __init__(self, cg, interval=WATCH_INTERVAL, idle_after=120):
+        # Sessions that stop asking within `idle_after` seconds drop out
+        self.cg = cg
+        self.idle_after = idle_after
+        self._sessions = {}
+        self._lock = threading.Lock()
+        self.poller = MarketPoller(lambda _: self._fetch(), interval=interval, idle_after=idle_after)
+
+    def _wanted(self):
+        now = time.time()
+        with self._lock:
+            for s in [s for s, (_, _, seen) in self._sessions.items() if now - seen > self.idle_after]:
+                del self._sessions[s]
+            entries = list(self._sessions.values())
+        currencies = sorted({cur for cur, ids, _ in entries if ids})
+        ids = sorted({i for _, ids, _ in entries for i in ids})
+        return currencies, ids
+
+    def _fetch(self):
+        currencies, ids = self._wanted()
+        rows = []
+        for at in range(0, len(ids), IDS_PER_CALL):
+            data = self.cg.get_price(ids[at:at + IDS_PER_CALL], currencies,
+                                     include_24hr_change=True, include_last_updated_at=True)
+            for cid, quote in data.items():
+                for cur in currencies:
+                    if cur in quote:
+                        rows.append((cid, cur, quote[cur], quote.get(f'{cur}_24h_change'),
+                                     quote.get('last_updated_at')))
+        return pd.DataFrame(rows, columns=QUOTE_COLUMNS)
+
+    def quotes(self, session, currency, ids):
+        """Latest quotes for `ids` in `currency`, indexed by id (and registers them)."""
+        ids = list(ids)
+        with self._lock:
+            self._sessions[session] = (currency, ids, time.time())
+        snap = self.poller.latest('all', timeout=0)
+        if snap is None or snap.df.empty:
+            return pd.DataFrame(columns=QUOTE_COLUMNS[2:]), snap
+        df = snap.df
+        sel = df[(df['currency'] == currency) & df['id'].isin(ids)]
+        return sel.set_index('id')[QUOTE_COLUMNS[2:]], snap